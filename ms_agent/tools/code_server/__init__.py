@@ -1,3 +1,3 @@
-from .lsp_code_server import LSPCodeServer
+from .lsp_code_server import LSPCheckBatcher, LSPCodeServer
 
-__all__ = ['LSPCodeServer']
+__all__ = ['LSPCodeServer', 'LSPCheckBatcher']
@@ -1,8 +1,12 @@
 import asyncio
+import glob
+import hashlib
 import json
 import os
+import re
 import shutil
 import sys
+import time
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
@@ -11,8 +15,104 @@ from ms_agent.utils import get_logger
 from ms_agent.utils.constants import (DEFAULT_INDEX_DIR, DEFAULT_LOCK_DIR,
                                       DEFAULT_OUTPUT_DIR)
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = get_logger()
 
+# Diagnostics whose lowercased message contains one of these are not critical
+_IGNORED_ERRORS = [
+    # 'cannot be assigned to', 'is not assignable to', 'cannot assign to',
+    '"none"',
+    'vue',
+    'unused',
+    'never used',
+    'never read',
+    'implicitly has'
+]
+_IGNORED_ERRORS_RE = re.compile('|'.join(map(re.escape, _IGNORED_ERRORS)))
+
+# TextDocumentSyncKind.Incremental
+_SYNC_INCREMENTAL = 2
+
+_SEVERITY_NAMES = {1: 'Error', 2: 'Warning', 3: 'Information', 4: 'Hint'}
+
+
+def _frame_message(payload: dict) -> bytes:
+    """Serialize a JSON-RPC payload behind its Content-Length header."""
+    body = None
+    if orjson is not None:
+        try:
+            body = orjson.dumps(payload)
+        except TypeError:
+            pass
+    if body is None:
+        body = json.dumps(payload).encode('utf-8')
+    # The length counts bytes, orjson keeps non-ASCII text unescaped
+    return b'Content-Length: %d\r\n\r\n' % len(body) + body
+
+
+def _parse_message(content: bytes) -> dict:
+    if orjson is not None:
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(content)
+
+
+def _common_prefix(a: str, b: str, limit: int) -> int:
+    """Length of the common prefix of a and b, at most limit."""
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_suffix(a: str, b: str, limit: int) -> int:
+    """Length of the common suffix of a and b, at most limit."""
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len(a) - mid:] == b[len(b) - mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _position(text: str, offset: int) -> dict:
+    """LSP position of offset in text, characters count UTF-16 units."""
+    line_start = text.rfind('\n', 0, offset) + 1
+    return {
+        'line': text.count('\n', 0, offset),
+        'character': len(text[line_start:offset].encode('utf-16-le')) // 2
+    }
+
+
+def _text_change(old: str, new: str) -> dict:
+    """The single range edit turning old into new for didChange."""
+    if '\r' in old or '\r' in new:
+        # Positions are only computed for \n line endings
+        return {'text': new}
+    limit = min(len(old), len(new))
+    prefix = _common_prefix(old, new, limit)
+    suffix = _common_suffix(old, new, limit - prefix)
+    return {
+        'range': {
+            'start': _position(old, prefix),
+            'end': _position(old,
+                             len(old) - suffix)
+        },
+        'text': new[prefix:len(new) - suffix]
+    }
+
 
 class LSPServer:
     """Base class for LSP server management"""
@@ -30,6 +130,17 @@ class LSPServer:
         self.index_dir = os.path.join(self.output_dir, DEFAULT_INDEX_DIR)
         self.lock_dir = os.path.join(self.output_dir, DEFAULT_LOCK_DIR)
         self.diagnostics_cache: Dict[str, List[dict]] = {}
+        # uri -> document version of the last published diagnostics, None
+        # if the server does not send one
+        self.diagnostic_versions: Dict[str, Optional[int]] = {}
+        # Whether the server accepts ranged didChange edits
+        self.incremental_sync = False
+        # uri -> text last sent for each open document
+        self.documents: Dict[str, str] = {}
+        # The server's diagnosticProvider, None if it only pushes diagnostics
+        self.diagnostic_provider: Optional[dict] = None
+        # uri -> (resultId, items) of the last pulled diagnostic report
+        self.diagnostic_reports: Dict[str, tuple] = {}
 
     async def start(self) -> bool:
         """Start the LSP server process"""
@@ -51,8 +162,15 @@ class LSPServer:
                 self.stdin = None
                 self.stdout = None
                 self.initialized = False
-
-    async def send_request(self, method: str, params: dict = None) -> dict:
+                self.documents.clear()
+                self.diagnostic_reports.clear()
+                self.diagnostics_cache.clear()
+                self.diagnostic_versions.clear()
+
+    async def send_request(self,
+                           method: str,
+                           params: dict = None,
+                           timeout: float = 120.0) -> dict:
         """Send a JSON-RPC request to the LSP server"""
         if not self.process or not self.stdin or not self.stdout:
             raise RuntimeError('LSP server not started')
@@ -66,38 +184,47 @@ class LSPServer:
             'params': params or {}
         }
 
-        content = json.dumps(request)
-        message = f'Content-Length: {len(content)}\r\n\r\n{content}'
-
         try:
-            self.stdin.write(message.encode('utf-8'))
+            self.stdin.write(_frame_message(request))
             await self.stdin.drain()
+            return await asyncio.wait_for(
+                self._read_response(request_id), timeout=timeout)
 
-            max_retries = 20
-            for _ in range(max_retries):
-                msg = await self._read_message()
-
-                # Check if it's the response we're waiting for
-                if 'id' in msg and msg['id'] == request_id:
-                    return msg
-
-                # It's a notification (no id) or response for different request
-                # Log and continue reading
-                if 'method' in msg:
-                    logger.debug(
-                        f"Received notification during request: {msg.get('method')}"
-                    )
-                    continue
-
+        except asyncio.TimeoutError:
             logger.warning(
-                f'No response received for request {request_id} after {max_retries} attempts'
+                f'No response received for request {request_id} after {timeout}s'
             )
             return {'error': 'No response received'}
-
         except Exception as e:
             logger.error(f'Error sending LSP request: {e}')
             return {'error': str(e)}
 
+    async def _read_response(self, request_id: int) -> dict:
+        """Read messages until the response to request_id arrives"""
+        while True:
+            msg = await self._read_message()
+
+            # Requests from the server carry an id as well, but also a method
+            if msg.get('id') == request_id and 'method' not in msg:
+                return msg
+
+            # A notification, a server request or a late response to an
+            # earlier request; pushed diagnostics are kept for later checks
+            if msg.get('method') == 'textDocument/publishDiagnostics':
+                self._cache_published(msg.get('params', {}))
+            elif 'method' in msg:
+                logger.debug(
+                    f"Received notification during request: {msg.get('method')}"
+                )
+
+    def _cache_published(self, params: dict) -> str:
+        """Cache the diagnostics of a publishDiagnostics, returns its uri"""
+        uri = params.get('uri')
+        self.diagnostics_cache[uri] = params.get('diagnostics', [])
+        self.diagnostic_versions[uri] = params.get('version')
+        logger.debug(f'Cached diagnostics for {uri}')
+        return uri
+
     async def send_notification(self, method: str, params: dict = None):
         """Send a JSON-RPC notification to the LSP server"""
         if not self.process or not self.stdin:
@@ -109,11 +236,8 @@ class LSPServer:
             'params': params or {}
         }
 
-        content = json.dumps(notification)
-        message = f'Content-Length: {len(content)}\r\n\r\n{content}'
-
         try:
-            self.stdin.write(message.encode('utf-8'))
+            self.stdin.write(_frame_message(notification))
             await self.stdin.drain()
         except Exception as e:
             logger.error(f'Error sending LSP notification: {e}')
@@ -141,7 +265,7 @@ class LSPServer:
         if content_length > 0:
             content = await self.stdout.readexactly(content_length)
             logger.info('LSP:' + content.decode('utf-8'))
-            return json.loads(content.decode('utf-8'))
+            return _parse_message(content)
         return {}
 
     async def initialize(self):
@@ -161,6 +285,9 @@ class LSPServer:
                 'capabilities': {
                     'textDocument': {
                         'publishDiagnostics': {},
+                        'diagnostic': {
+                            'dynamicRegistration': False
+                        },
                         'synchronization': {
                             'didOpen': True,
                             'didChange': True,
@@ -171,6 +298,15 @@ class LSPServer:
             })
 
         if 'result' in response:
+            capabilities = response['result'].get('capabilities', {})
+            sync = capabilities.get('textDocumentSync')
+            if isinstance(sync, dict):
+                sync = sync.get('change')
+            self.incremental_sync = sync == _SYNC_INCREMENTAL
+            provider = capabilities.get('diagnosticProvider')
+            if provider:
+                self.diagnostic_provider = provider if isinstance(
+                    provider, dict) else {}
             await self.send_notification('initialized', {})
 
             # CRITICAL: Wait for server to be fully ready
@@ -234,11 +370,16 @@ class LSPServer:
                     'text': content
                 }
             })
+        self.documents[file_uri] = content
         await asyncio.sleep(2.0)
 
     async def close_document(self, file_path: str):
         """Close a document to clean up old index"""
         file_uri = Path(file_path).resolve().as_uri()
+        self.documents.pop(file_uri, None)
+        self.diagnostic_reports.pop(file_uri, None)
+        self.diagnostics_cache.pop(file_uri, None)
+        self.diagnostic_versions.pop(file_uri, None)
         await self.send_notification('textDocument/didClose',
                                      {'textDocument': {
                                          'uri': file_uri
@@ -250,16 +391,21 @@ class LSPServer:
                               version: int = 2):
         """Update a document in the LSP server"""
         file_uri = Path(file_path).resolve().as_uri()
+        previous = self.documents.get(file_uri)
+        if self.incremental_sync and previous is not None:
+            # Only send the edited range, the server re-parses less
+            change = _text_change(previous, content)
+        else:
+            change = {'text': content}
         await self.send_notification(
             'textDocument/didChange', {
                 'textDocument': {
                     'uri': file_uri,
                     'version': version
                 },
-                'contentChanges': [{
-                    'text': content
-                }]
+                'contentChanges': [change]
             })
+        self.documents[file_uri] = content
 
     async def get_diagnostics(self,
                               file_path: str,
@@ -280,15 +426,10 @@ class LSPServer:
                 consecutive_timeouts = 0
 
                 if msg.get('method') == 'textDocument/publishDiagnostics':
-                    current_uri = msg.get('params', {}).get('uri')
-                    current_diags = msg.get('params',
-                                            {}).get('diagnostics', [])
-
-                    self.diagnostics_cache[current_uri] = current_diags
-                    logger.debug(f'Cached diagnostics for {current_uri}')
+                    current_uri = self._cache_published(msg.get('params', {}))
 
                     if current_uri == file_uri:
-                        diagnostics = current_diags
+                        diagnostics = self.diagnostics_cache[current_uri]
                         found_target = True
                         logger.debug(
                             f'Found target diagnostics for {file_uri}')
@@ -320,6 +461,51 @@ class LSPServer:
                 diagnostics = self.diagnostics_cache[file_uri]
         return diagnostics
 
+    def cached_diagnostics(self, file_path: str,
+                           version: int) -> Optional[List[dict]]:
+        """Diagnostics already published for a version, without waiting
+
+        Returns None if none arrived for that version yet, or if the
+        server publishes without a version and they may predate it.
+        """
+        file_uri = Path(file_path).resolve().as_uri()
+        if file_uri not in self.diagnostics_cache:
+            return None
+        if self.diagnostic_versions.get(file_uri) != version:
+            return None
+        return self.diagnostics_cache[file_uri]
+
+    async def pull_diagnostics(self, file_path: str) -> List[dict]:
+        """Pull diagnostics of a document from the server
+
+        The previous resultId is sent along, so the server only answers
+        `unchanged` when nothing moved since the last pull.
+        """
+        file_uri = Path(file_path).resolve().as_uri()
+        params = {'textDocument': {'uri': file_uri}}
+        if self.diagnostic_provider.get('identifier'):
+            params['identifier'] = self.diagnostic_provider['identifier']
+        report = self.diagnostic_reports.get(file_uri)
+        if report:
+            params['previousResultId'] = report[0]
+
+        response = await self.send_request('textDocument/diagnostic', params)
+        result = response.get('result')
+        if not result:
+            logger.warning(f'Failed to pull diagnostics for {file_uri}: '
+                           f"{response.get('error')}")
+            return self.diagnostics_cache.get(file_uri, [])
+
+        if result.get('kind') == 'unchanged' and report:
+            diagnostics = report[1]
+        else:
+            diagnostics = result.get('items', [])
+        if result.get('resultId'):
+            self.diagnostic_reports[file_uri] = (result['resultId'],
+                                                 diagnostics)
+        self.diagnostics_cache[file_uri] = diagnostics
+        return diagnostics
+
 
 class TypeScriptLSPServer(LSPServer):
     """TypeScript/JavaScript LSP server (tsserver)"""
@@ -524,6 +710,62 @@ class JavaLSPServer(LSPServer):
             return False
 
 
+class LSPIndexManifest:
+    """Fingerprints of the files a language server indexed last run
+
+    Entries map a workspace relative path to [mtime_ns, size, sha256].
+    """
+
+    schema = 1
+
+    def __init__(self, path: str, language: str, load: bool = True):
+        self.path = path
+        self.language = language
+        self.entries: Dict[str, list] = {}
+        # Entries of this run, only files still in the project are kept
+        self.updated: Dict[str, list] = {}
+        if not load:
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if (data.get('schema') == self.schema
+                    and data.get('language') == language):
+                self.entries = data.get('entries', {})
+        except (OSError, ValueError):
+            pass
+
+    def is_fresh(self, rel_path: str, stat: os.stat_result) -> bool:
+        """The file was not touched since it was indexed"""
+        entry = self.entries.get(rel_path)
+        return entry is not None and entry[:2] == [
+            stat.st_mtime_ns, stat.st_size
+        ]
+
+    def has_digest(self, rel_path: str, digest: str) -> bool:
+        entry = self.entries.get(rel_path)
+        return entry is not None and entry[2] == digest
+
+    def keep(self, rel_path: str):
+        self.updated[rel_path] = self.entries[rel_path]
+
+    def record(self, rel_path: str, stat: os.stat_result, digest: str):
+        self.updated[rel_path] = [stat.st_mtime_ns, stat.st_size, digest]
+
+    def save(self):
+        """Write the entries of this run, replacing the file atomically"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(
+                {
+                    'schema': self.schema,
+                    'language': self.language,
+                    'entries': self.updated
+                }, f)
+        os.replace(tmp_path, self.path)
+
+
 class LSPCodeServer(ToolBase):
 
     skip_files = [
@@ -547,27 +789,107 @@ class LSPCodeServer(ToolBase):
         self.file_versions: Dict[str, int] = {}
         self.opened_documents: Dict[str, str] = {
         }  # Track opened documents: file_path -> language
+        # Bumped on every document sent to the servers by update_and_check
+        self.change_count = 0
+        # file_path -> (content, change_count, result) of the last check
+        self.last_checks: Dict[str, tuple] = {}
         self.output_dir = getattr(self.config, 'output_dir',
                                   DEFAULT_OUTPUT_DIR)
         self.workspace_dir = self.output_dir
         self.index_dir = os.path.join(self.output_dir, DEFAULT_INDEX_DIR)
         self.lock_dir = os.path.join(self.output_dir, DEFAULT_LOCK_DIR)
-        self.cleanup_lsp_index_dirs()
+        # Set by the caller when the caches of the previous run still match
+        # the project (see lsp_state_matches), they and the index
+        # manifests are then kept instead of wiped
+        self.reuse_caches = getattr(self.config, 'reuse_lsp_caches', False)
+        if not self.reuse_caches:
+            self.cleanup_lsp_index_dirs()
 
     async def connect(self) -> None:
         """Initialize LSP servers"""
         logger.info('LSP Code Server connecting...')
 
+    def mark_workspace_changed(self):
+        """Report files written outside update_and_check
+
+        Results of earlier checks may depend on them, e.g. a missing
+        import that now exists, so none of them is reused.
+        """
+        self.change_count += 1
+
+    @staticmethod
+    def _lsp_dir(output_dir: str) -> str:
+        return os.path.join(output_dir, '.ms_agent', 'lsp')
+
+    @classmethod
+    def project_state_hash(cls, workspace_dir: str) -> str:
+        """Hash the paths, mtimes and sizes of the files the LSPs index"""
+        extensions = tuple(ext for exts in cls.language_mapping.values()
+                           for ext in exts)
+        skip_prefixes = tuple(cls.skip_prefixes)
+        entries = []
+        for root, dirs, files in os.walk(workspace_dir):
+            dirs[:] = [d for d in dirs if not d.startswith(skip_prefixes)]
+            for filename in files:
+                if not (filename.endswith(extensions)
+                        or filename in cls.skip_files):
+                    continue
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append(f'{os.path.relpath(path, workspace_dir)}\0'
+                               f'{stat.st_mtime_ns}\0{stat.st_size}')
+        entries.sort()
+        return hashlib.sha256('\n'.join(entries).encode('utf-8')).hexdigest()
+
+    @classmethod
+    def lsp_state_matches(cls, output_dir: str, files_hash: str) -> bool:
+        """Whether the saved LSP caches were built for files_hash"""
+        state_file = os.path.join(cls._lsp_dir(output_dir), 'state.json')
+        try:
+            with open(state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return state.get('files_hash') == files_hash
+
+    @classmethod
+    def save_lsp_index_state(cls, output_dir: str, files_hash: str):
+        """Keep the LSP caches for the next run of an unchanged project
+
+        Call once the servers stopped cleanly, the caches then match the
+        files that files_hash was computed from.
+        """
+        lsp_dir = cls._lsp_dir(output_dir)
+        os.makedirs(lsp_dir, exist_ok=True)
+        state_file = os.path.join(lsp_dir, 'state.json')
+        tmp_path = f'{state_file}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'last_success': time.time(),
+                'files_hash': files_hash
+            }, f)
+        os.replace(tmp_path, state_file)
+
     def cleanup_lsp_index_dirs(self):
+        """Wipe the LSP caches and the manifests and state built on them"""
+        lsp_dir = self._lsp_dir(self.output_dir)
         cleanup_dirs = [
-            os.path.join(self.output_dir, '.ms_agent', 'lsp',
-                         'jdtls'),  # Java LSP
+            os.path.join(lsp_dir, 'jdtls'),  # Java LSP
             os.path.join(self.output_dir,
                          '.pyright'),  # Python LSP (if exists)
             os.path.join(self.output_dir, 'node_modules',
                          '.cache'),  # TypeScript LSP cache
         ]
-
+        stale_files = glob.glob(os.path.join(lsp_dir, 'index_*.json'))
+        stale_files.append(os.path.join(lsp_dir, 'state.json'))
+        for file_path in stale_files:
+            try:
+                os.remove(file_path)
+            except OSError:
+                pass
         for dir_path in cleanup_dirs:
             if os.path.exists(dir_path):
                 try:
@@ -591,6 +913,7 @@ class LSPCodeServer(ToolBase):
         # Clear tracking
         self.opened_documents.clear()
         self.file_versions.clear()
+        self.last_checks.clear()
 
         # Stop all servers
         for server in self.servers.values():
@@ -657,6 +980,44 @@ class LSPCodeServer(ToolBase):
                     },
                     'required': ['file_path', 'content', 'language']
                 }
+            }, {
+                'tool_name':
+                'update_and_check_batch',
+                'description':
+                ('Update several files of one language and check them '
+                 'together, waiting for diagnostics only once. '
+                 'Returns a JSON list with one result per file.'),
+                'parameters': {
+                    'type': 'object',
+                    'properties': {
+                        'files': {
+                            'type':
+                            'array',
+                            'items': {
+                                'type': 'object',
+                                'properties': {
+                                    'file_path': {
+                                        'type': 'string'
+                                    },
+                                    'content': {
+                                        'type': 'string'
+                                    }
+                                },
+                                'required': ['file_path', 'content']
+                            },
+                            'description':
+                            'Files (relative to workspace) and their content'
+                        },
+                        'language': {
+                            'type':
+                            'string',
+                            'enum': ['typescript', 'python', 'java'],
+                            'description':
+                            'Programming language to check (typescript for JS/TS, python for Python, java for Java)'
+                        }
+                    },
+                    'required': ['files', 'language']
+                }
             }]
         }
 
@@ -671,6 +1032,9 @@ class LSPCodeServer(ToolBase):
             return await self._update_and_check(tool_args['file_path'],
                                                 tool_args['content'],
                                                 tool_args['language'])
+        elif tool_name == 'update_and_check_batch':
+            return json.dumps(await self.update_and_check_batch(
+                tool_args['files'], tool_args['language']))
         else:
             return json.dumps({'error': f'Unknown tool: {tool_name}'})
 
@@ -749,15 +1113,37 @@ class LSPCodeServer(ToolBase):
                     'diagnostics': []
                 })
 
+            # Only open files changed since the last indexing run, the
+            # others are opened by their first update_and_check if needed.
+            # That is only safe while the server caches of that run are
+            # kept, otherwise every file is opened again
+            manifest = LSPIndexManifest(
+                os.path.join(
+                    self._lsp_dir(self.output_dir), f'index_{language}.json'),
+                language,
+                load=self.reuse_caches)
             all_diagnostics = []
+            files_skipped = 0
             for file_path in all_files:
                 try:
-                    content = file_path.read_text(encoding='utf-8')
                     rel_path = file_path.relative_to(Path(self.workspace_dir))
+                    stat = file_path.stat()
+                    if manifest.is_fresh(str(rel_path), stat):
+                        manifest.keep(str(rel_path))
+                        files_skipped += 1
+                        continue
+                    content = file_path.read_text(encoding='utf-8')
+                    digest = hashlib.sha256(
+                        content.encode('utf-8')).hexdigest()
+                    if manifest.has_digest(str(rel_path), digest):
+                        manifest.record(str(rel_path), stat, digest)
+                        files_skipped += 1
+                        continue
                     self.file_versions[str(rel_path)] = 1
                     await server.open_document(
                         str(file_path), content, language)
                     self.opened_documents[str(file_path)] = language
+                    manifest.record(str(rel_path), stat, digest)
 
                     # Skip diagnostics for index-only mode (trust existing files)
                     # Uncomment below if you need to verify files:
@@ -770,13 +1156,20 @@ class LSPCodeServer(ToolBase):
                 except Exception as e:
                     logger.error(f'Error indexing file {file_path}: {e}')
 
+            try:
+                manifest.save()
+            except OSError as e:
+                logger.warning(f'Failed to save LSP index manifest: {e}')
+
             return json.dumps(
                 {
                     'directory': directory,
                     'language': language,
                     'file_count': len(all_files),
                     'diagnostics': all_diagnostics,
-                    'files_indexed': len(all_files) - len(all_diagnostics),
+                    'files_indexed':
+                    len(all_files) - len(all_diagnostics) - files_skipped,
+                    'files_skipped': files_skipped,
                     'status': 'indexed'
                 },
                 indent=2)
@@ -787,34 +1180,23 @@ class LSPCodeServer(ToolBase):
 
     @staticmethod
     def _format_diag_results(diagnostics_result):
-
-        ignored_errors = [
-            # 'cannot be assigned to', 'is not assignable to', 'cannot assign to',
-            '"none"',
-            'vue',
-            'unused',
-            'never used',
-            'never read',
-            'implicitly has'
-        ]
-
         if diagnostics_result.get('has_errors'):
             issues = diagnostics_result.get('diagnostics', [])
             # Filter critical errors only
             critical_errors = [
-                d for d in issues if d.get('severity') == 'Error' and not any([
-                    ignore in d.get('message', '').lower()
-                    for ignore in ignored_errors
-                ])
+                d for d in issues if d.get('severity') == 'Error' and
+                not _IGNORED_ERRORS_RE.search(d.get('message', '').lower())
             ]
 
             if critical_errors:
-                error_msg = f'\n⚠️ LSP detected {len(critical_errors)} critical issues:\n'
+                error_msg = [
+                    f'\n⚠️ LSP detected {len(critical_errors)} critical issues:\n'
+                ]
                 for i, diag in enumerate(critical_errors):
                     line = diag.get('line', 0)
                     msg = diag.get('message', '')
-                    error_msg += f'{i}. Line {line}: {msg}\n'
-                return error_msg
+                    error_msg.append(f'{i}. Line {line}: {msg}\n')
+                return ''.join(error_msg)
             else:
                 return ''
         else:
@@ -823,58 +1205,102 @@ class LSPCodeServer(ToolBase):
     async def _update_and_check(self, file_path: str, content: str,
                                 language: str) -> str:
         """Update file content and check for errors"""
+        results = await self.update_and_check_batch([{
+            'file_path': file_path,
+            'content': content
+        }], language)
+        return results[0]
+
+    async def update_and_check_batch(self, files: List[dict],
+                                     language: str) -> List[str]:
+        """Update several files, then check them with one diagnostics wait
+
+        Entry point of the update_and_check(_batch) tools and of
+        LSPCheckBatcher. Returns one result per file, in the order of
+        `files`; failures are reported as error JSON like the tools do.
+        """
+        results: List[Optional[str]] = [None] * len(files)
+        todo = []
+        for i, file in enumerate(files):
+            last_check = self.last_checks.get(file['file_path'])
+            if last_check and last_check[:2] == (file['content'],
+                                                 self.change_count):
+                # Neither this file nor any other document changed since its
+                # last check, skip the round trip which would report the same
+                results[i] = last_check[2]
+            else:
+                todo.append(i)
+        if not todo:
+            return results
+
         try:
             server = await self._get_or_create_server(language)
             if not server:
-                return json.dumps(
+                error = json.dumps(
                     {'error': f'Failed to start LSP server for {language}'})
+                return [error if r is None else r for r in results]
+
+            for i in todo:
+                file_path, content = files[i]['file_path'], files[i]['content']
+                full_path_str = str(Path(self.workspace_dir) / file_path)
+                if file_path not in self.file_versions:
+                    self.file_versions[file_path] = 1
+                    await server.open_document(full_path_str, content,
+                                               language)
+                    self.opened_documents[full_path_str] = language
+                else:
+                    self.file_versions[file_path] += 1
+                    await server.update_document(
+                        full_path_str,
+                        content,
+                        version=self.file_versions[file_path])
+                self.change_count += 1
+
+            for i in todo:
+                file_path, content = files[i]['file_path'], files[i]['content']
+                full_path_str = str(Path(self.workspace_dir) / file_path)
+                if server.diagnostic_provider is not None:
+                    diagnostics = await server.pull_diagnostics(full_path_str)
+                elif i == todo[0]:
+                    # Pushed diagnostics of every file in the batch are
+                    # cached while waiting for the first one
+                    diagnostics = await server.get_diagnostics(full_path_str)
+                else:
+                    diagnostics = server.cached_diagnostics(
+                        full_path_str, self.file_versions[file_path])
+                    if diagnostics is None:
+                        # Not published for this version yet, wait for it
+                        diagnostics = await server.get_diagnostics(
+                            full_path_str)
+
+                diagnostics_result = {
+                    'file': file_path,
+                    'language': language,
+                    'version': self.file_versions[file_path],
+                    'has_errors': len(diagnostics) > 0,
+                    'diagnostic_count': len(diagnostics),
+                    'diagnostics': self._format_diagnostics(diagnostics)
+                }
 
-            full_path = Path(self.workspace_dir) / file_path
-            full_path_str = str(full_path)
-
-            if file_path not in self.file_versions:
-                self.file_versions[file_path] = 1
-                await server.open_document(full_path_str, content, language)
-                self.opened_documents[full_path_str] = language
-            else:
-                self.file_versions[file_path] += 1
-                await server.update_document(
-                    full_path_str,
-                    content,
-                    version=self.file_versions[file_path])
-
-            diagnostics = await server.get_diagnostics(str(full_path))
-
-            diagnostics_result = {
-                'file': file_path,
-                'language': language,
-                'version': self.file_versions[file_path],
-                'has_errors': len(diagnostics) > 0,
-                'diagnostic_count': len(diagnostics),
-                'diagnostics': self._format_diagnostics(diagnostics)
-            }
-
-            return self._format_diag_results(diagnostics_result)
+                result = self._format_diag_results(diagnostics_result)
+                self.last_checks[file_path] = (content, self.change_count,
+                                               result)
+                results[i] = result
+            return results
 
         except Exception as e:
             logger.error(f'Error updating and checking file: {e}')
-            return json.dumps({'error': str(e)})
+            error = json.dumps({'error': str(e)})
+            return [error if r is None else r for r in results]
 
     @staticmethod
     def _format_diagnostics(diagnostics: List[dict]) -> List[dict]:
         """Format diagnostics for better readability"""
         formatted = []
         for diag in diagnostics:
-            severity_map = {
-                1: 'Error',
-                2: 'Warning',
-                3: 'Information',
-                4: 'Hint'
-            }
-
             formatted.append({
                 'severity':
-                severity_map.get(diag.get('severity', 1), 'Error'),
+                _SEVERITY_NAMES.get(diag.get('severity', 1), 'Error'),
                 'message':
                 diag.get('message', ''),
                 'line':
@@ -888,3 +1314,57 @@ class LSPCodeServer(ToolBase):
             })
 
         return formatted
+
+
+class LSPCheckBatcher:
+    """Send the update_and_check requests of one language in batches
+
+    Requests arriving while a batch is being checked are sent together as
+    the next batch, so they share one diagnostics wait. Only one batch runs
+    at a time, the server answers on a single stream.
+    """
+
+    def __init__(self, lsp_server: LSPCodeServer, language: str):
+        self.lsp_server = lsp_server
+        self.language = language
+        self.pending: List[tuple] = []
+        self._drain_task: Optional[asyncio.Task] = None
+
+    async def check(self, file_path: str, content: str) -> str:
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((file_path, content, future))
+        if self._drain_task is None:
+            self._drain_task = asyncio.create_task(self._drain())
+        return await future
+
+    async def _drain(self):
+        try:
+            while self.pending:
+                batch, rest, paths = [], [], set()
+                for item in self.pending:
+                    if item[2].done():
+                        # The caller was cancelled
+                        continue
+                    # A file is checked once per batch, newer content of the
+                    # same file waits for the next one
+                    (rest if item[0] in paths else batch).append(item)
+                    paths.add(item[0])
+                self.pending = rest
+                if not batch:
+                    continue
+                try:
+                    results = await self.lsp_server.update_and_check_batch(
+                        [{
+                            'file_path': file_path,
+                            'content': content
+                        } for file_path, content, _ in batch], self.language)
+                except Exception as e:  # noqa
+                    for _, _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for (_, _, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            self._drain_task = None
@@ -4,8 +4,137 @@ import json
 import os
 import re
 from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+try:
+    # google-re2 matches in linear time, so unterminated `import { ...`
+    # blocks cannot trigger backtracking blow-ups. It takes no flag
+    # arguments, hence the inline (?m)/(?s) flags in the patterns below.
+    import re2 as _re_engine
+except ImportError:
+    _re_engine = re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Python
+_PY_FROM_IMPORT_RE = _re_engine.compile(
+    r'(?ms)^\s*from\s+([\w.]+)\s+import\s+(?:\(([^)]+)\)|([^\n]+))')
+_PY_IMPORT_RE = _re_engine.compile(r'(?m)^\s*import\s+([\w.,\s]+)')
+
+# JavaScript / TypeScript
+_JS_MIXED_IMPORT_RE = _re_engine.compile(
+    r"(?ms)^\s*import\s+(type\s+)?(\w+)\s*,\s*\{([^}]+)\}\s*from\s+['\"]([^'\"]+)['\"]"
+)
+_JS_NAMED_IMPORT_RE = _re_engine.compile(
+    r"(?ms)^\s*import\s+(type\s+)?\{([^}]+)\}\s*from\s+['\"]([^'\"]+)['\"]")
+_JS_DEFAULT_IMPORT_RE = _re_engine.compile(
+    r"(?m)^\s*import\s+(type\s+)?(\w+)\s+from\s+['\"]([^'\"]+)['\"]")
+_JS_NAMESPACE_IMPORT_RE = _re_engine.compile(
+    r"(?m)^\s*import\s+(type\s+)?\*\s+as\s+(\w+)\s+from\s+['\"]([^'\"]+)['\"]")
+_JS_SIDE_EFFECT_IMPORT_RE = _re_engine.compile(
+    r"(?m)^\s*import\s+['\"]([^'\"]+)['\"]")
+_JS_EXPORT_NAMED_RE = _re_engine.compile(
+    r"(?ms)^\s*export\s+(type\s+)?\{([^}]+)\}\s+from\s+['\"]([^'\"]+)['\"]")
+_JS_EXPORT_WILDCARD_RE = _re_engine.compile(
+    r"(?m)^\s*export\s+(type\s+)?\*\s+from\s+['\"]([^'\"]+)['\"]")
+_JS_EXPORT_NAMED_WILDCARD_RE = _re_engine.compile(
+    r"(?m)^\s*export\s+(type\s+)?\*\s+as\s+(\w+)\s+from\s+['\"]([^'\"]+)['\"]")
+
+# Config files
+_JSONC_COMMENT_RE = _re_engine.compile(r'(?s)//.*?\n|/\*.*?\*/')
+_VITE_ALIAS_RE = _re_engine.compile(
+    r"['\"]([^'\"]+)['\"]\s*:\s*(?:path\.resolve\([^,]+,\s*['\"]"
+    r"([^'\"]+)['\"]\)|['\"]([^'\"]+)['\"])")
+
+# Java
+_JAVA_IMPORT_RE = _re_engine.compile(
+    r'(?m)^\s*import\s+(static\s+)?((?:[\w]+\.)*[\w*]+);?')
+
+# Upper bound on how far a multi-line statement (`import { ... }` or
+# `from x import (...)`) may extend past its first line.
+_MULTILINE_STATEMENT_WINDOW = 4096
+
+
+def _keyword_line_spans(code_content: str,
+                        keyword: str) -> List[Tuple[int, int]]:
+    """Return (start, end) offsets of every line containing keyword.
+
+    Uses str.find to jump between occurrences, so lines without the keyword
+    are never visited. Each line is reported at most once, in file order.
+    """
+    spans = []
+    pos = code_content.find(keyword)
+    while pos != -1:
+        start = code_content.rfind('\n', 0, pos) + 1
+        end = code_content.find('\n', pos)
+        if end == -1:
+            end = len(code_content)
+        spans.append((start, end))
+        pos = code_content.find(keyword, end)
+    return spans
+
+
+def _match_lines(pattern,
+                 code_content: str,
+                 spans: List[Tuple[int, int]],
+                 multiline: bool = False):
+    """Yield matches of a line-anchored pattern at each candidate line.
+
+    Single-line patterns are confined to their line; multi-line patterns may
+    run up to _MULTILINE_STATEMENT_WINDOW characters past the line start.
+    """
+    for start, end in spans:
+        if multiline:
+            end = start + _MULTILINE_STATEMENT_WINDOW
+        match = pattern.match(code_content, start, end)
+        if match:
+            yield match
+
+
+def _loads_jsonc(content: str):
+    """Parse JSON with comments (tsconfig style), tolerating trailing commas"""
+    content = _JSONC_COMMENT_RE.sub('', content)
+    try:
+        if orjson is not None:
+            return orjson.loads(content)
+        return json.loads(content)
+    except ValueError:
+        import json5
+        return json5.loads(content)
+
+
+@lru_cache(maxsize=256)
+def _read_tsconfig_aliases(tsconfig_path: str, base_dir: str,
+                           mtime_ns: int) -> Tuple[Tuple[str, str], ...]:
+    """Read (alias, target) pairs from a tsconfig.json
+
+    Cached per (path, mtime_ns), so an unchanged config is read and parsed
+    only once per process.
+    """
+    try:
+        with open(tsconfig_path, 'r', encoding='utf-8') as f:
+            tsconfig = _loads_jsonc(f.read())
+    except (ValueError, IOError):
+        return ()
+
+    if 'compilerOptions' not in tsconfig or 'paths' not in tsconfig[
+            'compilerOptions']:
+        return ()
+    base_url = tsconfig['compilerOptions'].get('baseUrl', '.')
+    aliases = []
+    for alias, paths in tsconfig['compilerOptions']['paths'].items():
+        if paths and len(paths) > 0:
+            target = paths[0].rstrip('/*')
+            resolved_target = os.path.normpath(
+                os.path.join(base_dir, base_url, target))
+            aliases.append((alias.rstrip('/*'), resolved_target))
+    return tuple(aliases)
 
 
 @dataclass
@@ -62,18 +191,18 @@ class PythonImportParser(BaseImportParser):
 
     def parse(self, code_content: str) -> List[ImportInfo]:
         imports = []
+        import_lines = _keyword_line_spans(code_content, 'import')
 
         # Pattern 1: from ... import ...
-        from_pattern = r'^\s*from\s+([\w.]+)\s+import\s+(?:\(([^)]+)\)|([^\n]+))'
-        for match in re.finditer(from_pattern, code_content,
-                                 re.MULTILINE | re.DOTALL):
+        for match in _match_lines(
+                _PY_FROM_IMPORT_RE, code_content, import_lines,
+                multiline=True):
             info = self._extract_from_import(match, code_content)
             if info:
                 imports.append(info)
 
         # Pattern 2: import ...
-        import_pattern = r'^\s*import\s+([\w.,\s]+)'
-        for match in re.finditer(import_pattern, code_content, re.MULTILINE):
+        for match in _match_lines(_PY_IMPORT_RE, code_content, import_lines):
             infos = self._extract_simple_import(match)
             imports.extend(infos)
 
@@ -259,74 +388,75 @@ class JavaScriptImportParser(BaseImportParser):
 
     def __init__(self, output_dir: str, current_file: str, current_dir: str):
         super().__init__(output_dir, current_file, current_dir)
+        # Immutable (alias, target) pairs, longest alias first, plus a
+        # lookup table for the exact-match case.
         self.path_aliases = self._load_path_aliases()
+        self._alias_exact = dict(self.path_aliases)
 
     def get_file_extensions(self) -> List[str]:
         return ['js', 'ts', 'jsx', 'tsx', 'mjs', 'cjs']
 
     def parse(self, code_content: str) -> List[ImportInfo]:
         imports = []
+        import_lines = _keyword_line_spans(code_content, 'import')
+        export_lines = _keyword_line_spans(code_content, 'export')
 
         # Pattern 1: Mixed import - import Default, { Named } from 'path'
         # Must come BEFORE Pattern 2 and 3 to avoid partial matches
-        mixed_pattern = r"^\s*import\s+(type\s+)?(\w+)\s*,\s*\{([^}]+)\}\s*from\s+['\"]([^'\"]+)['\"]"
-        for match in re.finditer(mixed_pattern, code_content,
-                                 re.MULTILINE | re.DOTALL):
+        for match in _match_lines(
+                _JS_MIXED_IMPORT_RE, code_content, import_lines,
+                multiline=True):
             infos = self._extract_mixed_import(match)
             if infos:
                 imports.extend(infos)
 
         # Pattern 2: Named import - import { A, B } from 'path' (supports multiline)
-        named_pattern = r"^\s*import\s+(type\s+)?\{([^}]+)\}\s*from\s+['\"]([^'\"]+)['\"]"
-        for match in re.finditer(named_pattern, code_content,
-                                 re.MULTILINE | re.DOTALL):
+        for match in _match_lines(
+                _JS_NAMED_IMPORT_RE, code_content, import_lines,
+                multiline=True):
             info = self._extract_named_import(match)
             if info:
                 imports.append(info)
 
         # Pattern 3: Default import - import React from 'path'
-        default_pattern = r"^\s*import\s+(type\s+)?(\w+)\s+from\s+['\"]([^'\"]+)['\"]"
-        for match in re.finditer(default_pattern, code_content, re.MULTILINE):
+        for match in _match_lines(_JS_DEFAULT_IMPORT_RE, code_content,
+                                  import_lines):
             info = self._extract_default_import(match)
             if info:
                 imports.append(info)
 
         # Pattern 4: Namespace import - import * as name from 'path'
-        namespace_pattern = r"^\s*import\s+(type\s+)?\*\s+as\s+(\w+)\s+from\s+['\"]([^'\"]+)['\"]"
-        for match in re.finditer(namespace_pattern, code_content,
-                                 re.MULTILINE):
+        for match in _match_lines(_JS_NAMESPACE_IMPORT_RE, code_content,
+                                  import_lines):
             info = self._extract_namespace_import(match)
             if info:
                 imports.append(info)
 
         # Pattern 5: Side-effect import - import 'path'
-        side_effect_pattern = r"^\s*import\s+['\"]([^'\"]+)['\"]"
-        for match in re.finditer(side_effect_pattern, code_content,
-                                 re.MULTILINE):
+        for match in _match_lines(_JS_SIDE_EFFECT_IMPORT_RE, code_content,
+                                  import_lines):
             info = self._extract_side_effect_import(match)
             if info:
                 imports.append(info)
 
         # Pattern 6: Named re-export - export { A, B } from 'path' (supports multiline)
-        export_named_pattern = r"^\s*export\s+(type\s+)?\{([^}]+)\}\s+from\s+['\"]([^'\"]+)['\"]"
-        for match in re.finditer(export_named_pattern, code_content,
-                                 re.MULTILINE | re.DOTALL):
+        for match in _match_lines(
+                _JS_EXPORT_NAMED_RE, code_content, export_lines,
+                multiline=True):
             info = self._extract_export_named(match)
             if info:
                 imports.append(info)
 
         # Pattern 7: Wildcard re-export - export * from 'path'
-        export_wildcard_pattern = r"^\s*export\s+(type\s+)?\*\s+from\s+['\"]([^'\"]+)['\"]"
-        for match in re.finditer(export_wildcard_pattern, code_content,
-                                 re.MULTILINE):
+        for match in _match_lines(_JS_EXPORT_WILDCARD_RE, code_content,
+                                  export_lines):
             info = self._extract_export_wildcard(match)
             if info:
                 imports.append(info)
 
         # Pattern 8: Named wildcard re-export - export * as name from 'path'
-        export_named_wildcard_pattern = r"^\s*export\s+(type\s+)?\*\s+as\s+(\w+)\s+from\s+['\"]([^'\"]+)['\"]"
-        for match in re.finditer(export_named_wildcard_pattern, code_content,
-                                 re.MULTILINE):
+        for match in _match_lines(_JS_EXPORT_NAMED_WILDCARD_RE, code_content,
+                                  export_lines):
             info = self._extract_export_named_wildcard(match)
             if info:
                 imports.append(info)
@@ -646,8 +776,13 @@ class JavaScriptImportParser(BaseImportParser):
                 default_ext = '.tsx'
         return to_relative(resolved + default_ext)
 
-    def _load_path_aliases(self) -> Dict[str, str]:
-        """Load path aliases from tsconfig.json and vite.config"""
+    def _load_path_aliases(self) -> Tuple[Tuple[str, str], ...]:
+        """Load path aliases from tsconfig.json and vite.config
+
+        Returns a frozen tuple of (alias, target) pairs sorted by alias
+        length (longest first), so prefix matching picks the most specific
+        alias.
+        """
         aliases = {}
         excluded_dirs = {
             'node_modules', 'dist', 'build', '.git', '__pycache__'
@@ -679,33 +814,19 @@ class JavaScriptImportParser(BaseImportParser):
                     aliases['~'] = root
                     break
 
-        return aliases
+        return tuple(sorted(aliases.items(), key=lambda kv: -len(kv[0])))
 
     def _parse_tsconfig_aliases(self, tsconfig_path: str, base_dir: str,
                                 aliases: Dict[str, str]):
         """Parse tsconfig.json and extract path aliases"""
         try:
-            with open(tsconfig_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                # Remove comments
-                content = re.sub(
-                    r'//.*?\n|/\*.*?\*/', '', content, flags=re.DOTALL)
-                tsconfig = json.loads(content)
-
-                if 'compilerOptions' in tsconfig and 'paths' in tsconfig[
-                        'compilerOptions']:
-                    base_url = tsconfig['compilerOptions'].get('baseUrl', '.')
-                    for alias, paths in tsconfig['compilerOptions'][
-                            'paths'].items():
-                        clean_alias = alias.rstrip('/*')
-                        if paths and len(paths) > 0:
-                            target = paths[0].rstrip('/*')
-                            resolved_target = os.path.normpath(
-                                os.path.join(base_dir, base_url, target))
-                            if clean_alias not in aliases:
-                                aliases[clean_alias] = resolved_target
-        except (json.JSONDecodeError, IOError, KeyError):
-            pass
+            mtime_ns = os.stat(tsconfig_path).st_mtime_ns
+        except OSError:
+            return
+        for clean_alias, resolved_target in _read_tsconfig_aliases(
+                tsconfig_path, base_dir, mtime_ns):
+            if clean_alias not in aliases:
+                aliases[clean_alias] = resolved_target
 
     def _parse_vite_config_aliases(self, config_path: str, base_dir: str,
                                    aliases: Dict[str, str]):
@@ -713,10 +834,7 @@ class JavaScriptImportParser(BaseImportParser):
         try:
             with open(config_path, 'r', encoding='utf-8') as f:
                 content = f.read()
-                alias_pattern = (
-                    r"['\"]([^'\"]+)['\"]\s*:\s*(?:path\.resolve\([^,]+,\s*['\"]"
-                    r"([^'\"]+)['\"]\)|['\"]([^'\"]+)['\"])")
-                for match in re.finditer(alias_pattern, content):
+                for match in _VITE_ALIAS_RE.finditer(content):
                     alias_key = match.group(1)
                     target = match.group(2) or match.group(3)
                     if target:
@@ -729,10 +847,13 @@ class JavaScriptImportParser(BaseImportParser):
 
     def _resolve_alias_path(self, import_path: str) -> Optional[str]:
         """Resolve path alias to actual path"""
-        for alias, target in self.path_aliases.items():
-            if import_path == alias:
-                return target
-            elif import_path.startswith(alias + '/'):
+        if not self.path_aliases:
+            return None
+        target = self._alias_exact.get(import_path)
+        if target is not None:
+            return target
+        for alias, target in self.path_aliases:
+            if import_path.startswith(alias + '/'):
                 remainder = import_path[len(alias) + 1:]
                 return os.path.join(target, remainder)
         return None
@@ -748,8 +869,8 @@ class JavaImportParser(BaseImportParser):
         imports = []
 
         # Pattern: import [static] package.Class[.*]; or import [static] package.*;
-        import_pattern = r'^\s*import\s+(static\s+)?((?:[\w]+\.)*[\w*]+);?'
-        for match in re.finditer(import_pattern, code_content, re.MULTILINE):
+        for match in _match_lines(_JAVA_IMPORT_RE, code_content,
+                                  _keyword_line_spans(code_content, 'import')):
             info = self._extract_java_import(match)
             if info:
                 imports.append(info)
@@ -817,6 +938,14 @@ class ImportParserFactory:
         return None
 
 
+def _split_file_path(current_file: str) -> Tuple[str, str]:
+    """Return (file_ext, current_dir) for a file being parsed"""
+    file_ext = os.path.splitext(current_file)[1].lstrip(
+        '.').lower() if current_file else ''
+    current_dir = os.path.dirname(current_file) if current_file else '.'
+    return file_ext, current_dir
+
+
 def parse_imports(current_file: str, code_content: str,
                   output_dir: str) -> List[ImportInfo]:
     """
@@ -833,10 +962,7 @@ def parse_imports(current_file: str, code_content: str,
     Returns:
         List of ImportInfo objects for project files only (external packages are excluded)
     """
-    # Detect file extension
-    file_ext = os.path.splitext(current_file)[1].lstrip(
-        '.').lower() if current_file else ''
-    current_dir = os.path.dirname(current_file) if current_file else '.'
+    file_ext, current_dir = _split_file_path(current_file)
 
     # Get appropriate parser
     parser = ImportParserFactory.get_parser(file_ext, output_dir, current_file,
@@ -844,9 +970,82 @@ def parse_imports(current_file: str, code_content: str,
     if not parser:
         return []
 
-    # Parse all imports
-    all_imports = parser.parse(code_content)
+    return _filter_project_imports(
+        parser.parse(code_content), file_ext, output_dir)
+
+
+def parse_imports_batch(files: List[Tuple[str, str]],
+                        output_dir: str) -> Dict[str, List[ImportInfo]]:
+    """
+    Parse imports for many files of one project, sharing parser state.
+
+    One parser is built per file extension and re-pointed at each file, so
+    per-project setup (e.g. the JS/TS path-alias scan) happens once instead
+    of once per file. Filtering is identical to `parse_imports`.
+
+    Args:
+        files: (current_file, code_content) pairs
+        output_dir: Root directory of the project
+
+    Returns:
+        Mapping of current_file to its project-file imports
+    """
+    parsers: Dict[str, Optional[BaseImportParser]] = {}
+    results: Dict[str, List[ImportInfo]] = {}
+    for current_file, code_content in files:
+        file_ext, current_dir = _split_file_path(current_file)
+        if file_ext not in parsers:
+            parsers[file_ext] = ImportParserFactory.get_parser(
+                file_ext, output_dir, current_file, current_dir)
+        parser = parsers[file_ext]
+        if not parser:
+            results[current_file] = []
+            continue
+
+        parser.current_file = current_file
+        parser.current_dir = current_dir
+        results[current_file] = _filter_project_imports(
+            parser.parse(code_content), file_ext, output_dir)
+    return results
 
+
+def parse_imports_parallel(
+        files: List[Tuple[str, str]],
+        output_dir: str,
+        workers: Optional[int] = None) -> Dict[str, List[ImportInfo]]:
+    """
+    Parse imports for many files across worker processes.
+
+    Regex matching is CPU-bound and holds the GIL, so large projects are
+    split into chunks that each run `parse_imports_batch` in a separate
+    process; parser state is shared within a chunk. Small inputs (or a
+    single worker) are parsed in-process.
+
+    Args:
+        files: (current_file, code_content) pairs
+        output_dir: Root directory of the project
+        workers: Number of processes, defaults to os.cpu_count()
+
+    Returns:
+        Mapping of current_file to its project-file imports
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(files) <= 1:
+        return parse_imports_batch(files, output_dir)
+
+    chunksize = max(1, len(files) // (workers * 4))
+    chunks = [files[i:i + chunksize] for i in range(0, len(files), chunksize)]
+    results: Dict[str, List[ImportInfo]] = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk_results in executor.map(parse_imports_batch, chunks,
+                                          [output_dir] * len(chunks)):
+            results.update(chunk_results)
+    return results
+
+
+def _filter_project_imports(all_imports: List[ImportInfo], file_ext: str,
+                            output_dir: str) -> List[ImportInfo]:
+    """Drop external packages, keeping only imports of project files"""
     # Filter out external packages - only keep project files
     project_imports = []
     for imp in all_imports:
@@ -737,20 +737,27 @@ def extract_code_blocks(
         file_wrapper = ['<result>', '</result>']
     assert len(file_wrapper) == 2
     pattern = rf'{file_wrapper[0]}[a-zA-Z]*:([^\n\r`]+)\n(.*?){file_wrapper[1]}'
-    matches = re.findall(pattern, text, re.DOTALL)
     result = []
-
-    for filename, code in matches:
+    # Without a target every block is removed, so the text between the
+    # matches is collected in the same scan instead of a second re.sub
+    remaining = []
+    pos = 0
+    for match in re.finditer(pattern, text, re.DOTALL):
+        filename, code = match.groups()
         filename = filename.strip()
-        if target_filename is None or filename == target_filename:
-            result.append({'filename': filename, 'code': code.strip()})
+        if target_filename is None:
+            remaining.append(text[pos:match.start()])
+            pos = match.end()
+        elif filename != target_filename:
+            continue
+        result.append({'filename': filename, 'code': code.strip()})
+    remaining.append(text[pos:])
 
     if target_filename is not None:
         remove_pattern = rf'{file_wrapper[0]}[a-zA-Z]*:{re.escape(target_filename)}\n.*?{file_wrapper[1]}'
+        remaining_text = re.sub(remove_pattern, '', text, flags=re.DOTALL)
     else:
-        remove_pattern = pattern
-
-    remaining_text = re.sub(remove_pattern, '', text, flags=re.DOTALL)
+        remaining_text = ''.join(remaining)
     remaining_text = re.sub(r'\n\s*\n\s*\n', '\n\n', remaining_text)
     remaining_text = remaining_text.strip()
 
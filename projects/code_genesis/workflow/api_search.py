@@ -1,13 +1,82 @@
+import asyncio
 import json
 import os
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Any, Dict
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
 
 from ms_agent.llm.utils import Tool
 from ms_agent.tools.base import ToolBase
 from ms_agent.utils.constants import DEFAULT_INDEX_DIR
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _iter_files(root: str):
+    """Yield every file under root, lazily, using scandir's cached types"""
+    try:
+        entries = os.scandir(root)
+    except OSError:
+        return
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_files(entry.path)
+            elif entry.is_file():
+                yield entry.path
+
+
+# Parsed index files kept by ApiSearch
+_FILE_CACHE_SIZE = 256
+
+
+def _load_index(f):
+    """Return the entries of the top-level `protocols` list of an index file"""
+    content = orjson.loads(f.read()) if orjson is not None else json.load(f)
+    return content.get('protocols', [])
+
+
+def _dumps_protocol(protocol) -> str:
+    """Serialize a protocol entry, with orjson when it is installed
+
+    The stdlib fallback writes the same compact text, so results read the
+    same whether orjson is installed or not.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(protocol).decode('utf-8')
+        except TypeError:
+            # e.g. integers wider than 64 bits, let the stdlib handle them
+            pass
+    return json.dumps(protocol, ensure_ascii=False, separators=(',', ':'))
+
+
+def _build_keyword_matcher(keywords):
+    """Return a predicate telling whether a url contains any of keywords.
+
+    All keywords are matched in a single pass over the url: an Aho-Corasick
+    automaton when pyahocorasick is installed, else one regex alternation.
+    """
+    if not keywords:
+        return lambda url: False
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for keyword in keywords:
+            automaton.add_word(keyword, keyword)
+        automaton.make_automaton()
+        return lambda url: next(automaton.iter(url), None) is not None
+    pattern = re.compile('|'.join(map(re.escape, keywords)))
+    return lambda url: pattern.search(url) is not None
+
 
 class ApiSearch(ToolBase):
 
@@ -15,6 +84,13 @@ class ApiSearch(ToolBase):
         super().__init__(config)
         index_dir = getattr(config, 'index_cache_dir', DEFAULT_INDEX_DIR)
         self.index_dir = os.path.join(self.output_dir, index_dir)
+        # file_path -> ((mtime_ns, size), [(url, serialized protocol), ...]),
+        # least recently used first
+        self._file_cache: Dict[str, Tuple[Tuple[int, int],
+                                          List[Tuple[str, str]]]] = (
+                                              OrderedDict())
+        # Files are searched from several executor threads
+        self._file_cache_lock = threading.Lock()
 
     async def connect(self) -> None:
         pass
@@ -60,6 +136,29 @@ class ApiSearch(ToolBase):
                         tool_args: dict) -> str:
         return await self.url_search(**tool_args)
 
+    def _load_protocols(self, file_path: str) -> List[Tuple[str, str]]:
+        """Return (url, serialized protocol) pairs of an index file.
+
+        Re-parsed only when the file changes; protocols are serialized once
+        here instead of on every match.
+        """
+        stat = os.stat(file_path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._file_cache_lock:
+            cached = self._file_cache.get(file_path)
+            if cached is not None and cached[0] == version:
+                self._file_cache.move_to_end(file_path)
+                return cached[1]
+        with open(file_path, 'rb') as f:
+            protocols = [(protocol['url'], _dumps_protocol(protocol))
+                         for protocol in _load_index(f)]
+        with self._file_cache_lock:
+            self._file_cache[file_path] = (version, protocols)
+            self._file_cache.move_to_end(file_path)
+            if len(self._file_cache) > _FILE_CACHE_SIZE:
+                self._file_cache.popitem(last=False)
+        return protocols
+
     async def url_search(self, keywords: str = None):
         """Search API definitions using keywords with support for regex and substring matching.
 
@@ -73,7 +172,7 @@ class ApiSearch(ToolBase):
             str: Formatted search results
         """
         # Parse keywords and determine matching mode
-        keyword_list = None
+        keyword_match = None
         use_regex = False
         regex_pattern = None
 
@@ -84,35 +183,27 @@ class ApiSearch(ToolBase):
                 use_regex = True
             except re.error:
                 # Not a valid regex, treat as comma-separated keywords
-                keyword_list = [
-                    kw.strip() for kw in keywords.split(',') if kw.strip()
-                ]
+                keyword_list = tuple(kw.strip() for kw in keywords.split(',')
+                                     if kw.strip())
+                keyword_match = _build_keyword_matcher(keyword_list)
                 use_regex = False
 
         def search_in_file(file_path):
             matches = []
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = json.load(f)
-                    if 'protocols' not in content:
-                        return []
-                    for protocol in content['protocols']:
-                        url = protocol['url']
-
-                        if not keywords:
-                            # No filter, match all
-                            is_match = True
-                        elif use_regex:
-                            # Regex matching
-                            is_match = regex_pattern.search(url) is not None
-                        else:
-                            # Substring matching (any keyword matches)
-                            is_match = any(keyword in url
-                                           for keyword in keyword_list)
-
-                        if is_match:
-                            matches.append(
-                                json.dumps(protocol, ensure_ascii=False))
+                for url, protocol in self._load_protocols(file_path):
+                    if not keywords:
+                        # No filter, match all
+                        is_match = True
+                    elif use_regex:
+                        # Regex matching
+                        is_match = regex_pattern.search(url) is not None
+                    else:
+                        # Substring matching (any keyword matches)
+                        is_match = keyword_match(url)
+
+                    if is_match:
+                        matches.append(protocol)
             except Exception:  # noqa
                 return []
             if matches:
@@ -124,19 +215,11 @@ class ApiSearch(ToolBase):
                 matches.append('\n')
             return matches
 
-        files_to_search = []
-        for path, _, files in os.walk(self.index_dir):
-            for file in files:
-                files_to_search.append(os.path.join(path, file))
-
-        # Use thread pool to search files in parallel
-        all_matches = []
-        with ThreadPoolExecutor(max_workers=8) as executor:
-            future_to_file = {
-                executor.submit(search_in_file, f): f
-                for f in files_to_search
-            }
-            for future in as_completed(future_to_file):
-                matches = future.result()
-                all_matches.extend(matches)
+        # Search files in parallel on the default executor without blocking
+        # the event loop; gather keeps the results in file order
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(
+            *(loop.run_in_executor(None, search_in_file, f)
+              for f in _iter_files(self.index_dir)))
+        all_matches = [match for matches in results for match in matches]
         return '\n'.join(all_matches)
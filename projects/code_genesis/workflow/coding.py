@@ -1,11 +1,13 @@
 import asyncio
 import dataclasses
+import hashlib
 import json
 import os
 import re
 import shutil
 from collections import OrderedDict
 from copy import deepcopy
+from functools import lru_cache
 from omegaconf import DictConfig
 from pathlib import Path
 from typing import List, Optional, Set
@@ -14,12 +16,17 @@ from ms_agent import LLMAgent
 from ms_agent.agent import CodeAgent
 from ms_agent.llm import Message
 from ms_agent.memory.condenser.code_condenser import CodeCondenser
-from ms_agent.tools.code_server import LSPCodeServer
+from ms_agent.tools.code_server import LSPCheckBatcher, LSPCodeServer
 from ms_agent.utils import get_logger
 from ms_agent.utils.constants import (DEFAULT_INDEX_DIR, DEFAULT_LOCK_DIR,
                                       DEFAULT_TAG)
 from ms_agent.utils.parser_utils import ImportInfo, parse_imports
-from ms_agent.utils.utils import extract_code_blocks, file_lock
+from ms_agent.utils.utils import extract_code_blocks
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = get_logger()
 
@@ -52,6 +59,85 @@ stop_words = [
     '\n@',
 ]
 
+# `<result>lang: path` header line, the code written so far follows it
+_RESULT_RE = re.compile(r'<result>[a-zA-Z]*:([^\n\r`]+)\n')
+
+
+def _match_result(content: str):
+    """Return the first `<result>` header match in content, or None.
+
+    Candidates are located with str.find and the regex is only tried,
+    anchored, at those offsets instead of scanning the whole message.
+    """
+    pos = content.find('<result>')
+    while pos != -1:
+        match = _RESULT_RE.match(content, pos)
+        if match:
+            return match
+        pos = content.find('<result>', pos + 1)
+    return None
+
+
+def _json_loads(text):
+    """json.loads through orjson when it is installed.
+
+    Anything orjson rejects (NaN, integers wider than 64 bits) is retried
+    with the stdlib so both accept the same input.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(text)
+
+
+# Lines starting with these are comments or markdown, not import statements
+_COMMENT_PREFIXES = ('*', '#', '-', '%', '/')
+
+
+def _strip_comment_lines(code: str) -> str:
+    return '\n'.join(
+        line for line in code.split('\n')
+        if not line.strip().startswith(_COMMENT_PREFIXES))
+
+
+def _read_text(path: str) -> str:
+    with open(path, 'r') as f:
+        return f.read()
+
+
+@lru_cache(maxsize=512)
+def _read_source_cached(path: str, mtime_ns: int, size: int) -> str:
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+# Identifiers of Python, JS/TS and Java sources
+_IDENTIFIER_RE = re.compile(r'[^\W\d][\w$]*|\$[\w$]*')
+
+
+@lru_cache(maxsize=512)
+def _source_symbols_cached(path: str, mtime_ns: int, size: int) -> frozenset:
+    return frozenset(
+        _IDENTIFIER_RE.findall(_read_source_cached(path, mtime_ns, size)))
+
+
+def _source_symbols(path: str) -> frozenset:
+    """Identifiers appearing in a source file, cached like _read_source."""
+    stat = os.stat(path)
+    return _source_symbols_cached(path, stat.st_mtime_ns, stat.st_size)
+
+
+def _read_source(path: str) -> str:
+    """Read a source file, re-reading only after it changed on disk.
+
+    Shared by all Programmers, which check the same dependencies and
+    unchecked files over and over while fixing imports and LSP issues.
+    """
+    stat = os.stat(path)
+    return _read_source_cached(path, stat.st_mtime_ns, stat.st_size)
+
 
 class Programmer(LLMAgent):
 
@@ -71,13 +157,29 @@ class Programmer(LLMAgent):
         self.lsp_check = getattr(config, 'lsp_check', True)
         self.index_dir = os.path.join(self.output_dir, index_dir)
         self.lock_dir = os.path.join(self.output_dir, DEFAULT_LOCK_DIR)
+        # output_dir and index_dir with a trailing separator, prefixes for
+        # relative plan paths
+        self._out = os.path.join(self.output_dir, '')
+        self._index = os.path.join(self.index_dir, '')
         # self.code_condenser = CodeCondenser(config)
         self.code_files = []
         self.shared_lsp_context = kwargs.get('shared_lsp_context', {})
+        # Parent directories already created for saved files, shared by
+        # the Programmers of one run
+        self._made_dirs = self.shared_lsp_context.setdefault(
+            'made_dirs', set())
         self.unchecked_files = {}
         self.unchecked_issues = {}
         self.stop_words = [stop_words, []]
-        self.find_all_files()
+        # Whether stop_sequences currently holds the import stop words
+        self._stop_active = False
+        # Paths passed to read_file so far, collected incrementally
+        self._read_files = set()
+        # (index, message) of the last tool-call message scanned
+        self._read_files_mark = None
+        # (code_file, code digest, project generation) -> parsed imports
+        self._import_cache = OrderedDict()
+        self.find_all_files(kwargs.get('all_code_files'))
         self.error_counter = 0
 
     def _validate_config(self, config: DictConfig) -> DictConfig:
@@ -128,28 +230,91 @@ class Programmer(LLMAgent):
             self.llm.args['extra_body']['stop_sequences'] = self.stop_words[0]
         else:
             self.llm.args['extra_body']['stop_sequences'] = self.stop_words[1]
+        self._stop_active = bool(self.pre_import_check)
 
     def stop_nothing(self):
         self.llm.args['extra_body']['stop_sequences'] = self.stop_words[1]
+        self._stop_active = False
 
     def is_stop_imports(self):
-        return self.llm.args['extra_body'][
-            'stop_sequences'] == self.stop_words[0]
+        return self._stop_active
 
-    def find_all_files(self):
+    def find_all_files(self, all_code_files=None):
+        if all_code_files is not None:
+            # Parsed once by CodingAgent for all Programmers
+            self.all_code_files = all_code_files
+            return
         self.all_code_files = []
         with open(os.path.join(self.output_dir, 'file_order.txt'), 'r') as f:
-            for group in json.load(f):
+            for group in _json_loads(f.read()):
                 self.all_code_files.extend(group['files'])
 
+    def _ingest_read_files(self, messages):
+        """Add read_file paths from messages not scanned yet.
+
+        Scanning resumes after the last tool-call message seen, if it is
+        still at the same index; otherwise the history was rewritten and
+        everything is scanned again.
+        """
+        start = 0
+        if self._read_files_mark is not None:
+            idx, marked = self._read_files_mark
+            if idx < len(messages) and messages[idx] is marked:
+                start = idx + 1
+            else:
+                self._read_files = set()
+        for idx in range(start, len(messages)):
+            message = messages[idx]
+            if not message.tool_calls:
+                continue
+            self._read_files_mark = (idx, message)
+            for tool_call in message.tool_calls:
+                if 'read_file' in tool_call['tool_name']:
+                    arguments = tool_call['arguments']
+                    if isinstance(arguments, str):
+                        try:
+                            arguments = _json_loads(arguments)
+                            self._read_files.update(arguments['paths'])
+                        except json.decoder.JSONDecodeError:
+                            pass
+        return self._read_files
+
+    def _bump_generation(self):
+        """Mark that project files may have been created or removed"""
+        self.shared_lsp_context['generation'] = self.shared_lsp_context.get(
+            'generation', 0) + 1
+        # Cached LSP results may report errors the new files resolved
+        for lsp_server in self.shared_lsp_context.get('lsp_servers',
+                                                      {}).values():
+            lsp_server.mark_workspace_changed()
+
+    def _parse_imports(self, code_file, code):
+        # Imports can only appear in the code after the header, the prose
+        # before it needs no splitting or parsing
+        code = _strip_comment_lines(code)
+        # Retries often repeat the same imports. Resolution looks at the
+        # files on disk, so results are only reused while no file was
+        # written in between
+        key = (code_file,
+               hashlib.blake2b(code.encode('utf-8'), digest_size=16).digest(),
+               self.shared_lsp_context.get('generation', 0))
+        all_files = self._import_cache.get(key)
+        if all_files is not None:
+            self._import_cache.move_to_end(key)
+            return all_files
+        all_files = parse_imports(code_file, code, self.output_dir) or []
+        self._import_cache[key] = all_files
+        if len(self._import_cache) > 128:
+            self._import_cache.popitem(last=False)
+        return all_files
+
     def _before_import_check(self, messages):
         content = messages[-1].content
-        pattern = r'<result>[a-zA-Z]*:([^\n\r`]+)\n(.*)'
-        matches = re.findall(pattern, content, re.DOTALL)
-        try:
-            code_file = next(iter(matches))[0].strip()
-            code = next(iter(matches))[1].strip()
-        except StopIteration:
+        match = _match_result(content)
+        if match:
+            code_file = match.group(1).strip()
+            code = content[match.end():].strip()
+        else:
             code_file = ''
             code = ''
 
@@ -158,38 +323,20 @@ class Programmer(LLMAgent):
             self.stop_nothing()
             return
 
-        def find_all_read_files():
-            files = []
-            for message in messages:
-                if message.tool_calls:
-                    for tool_call in message.tool_calls:
-                        if 'read_file' in tool_call['tool_name']:
-                            arguments = tool_call['arguments']
-                            if isinstance(arguments, str):
-                                try:
-                                    arguments = json.loads(arguments)
-                                    files.extend(arguments['paths'])
-                                except json.decoder.JSONDecodeError:
-                                    pass
-            return set(files)
-
         def read_file(path):
-            if os.path.exists(os.path.join(self.index_dir, path)):
-                with open(os.path.join(self.index_dir, path), 'r') as f:
-                    return f.read()
+            index_path = self._index + path
+            if os.path.exists(index_path):
+                return _read_source(index_path)
             else:
-                with open(os.path.join(self.output_dir, path), 'r') as f:
-                    return f.read()
-
-        contents = content.split('\n')
-        comments = ['*', '#', '-', '%', '/']
-        contents = [
-            c for c in contents
-            if not any(c.strip().startswith(cm) for cm in comments)
-        ]
-        all_files = parse_imports(code_file, '\n'.join(contents),
-                                  self.output_dir) or []
-        all_read_files = find_all_read_files()
+                return _read_source(self._out + path)
+
+        if os.path.exists(self._out + code_file):
+            # Another Programmer already saved this file and _save_code keeps
+            # its content, import hints for this answer would be wasted
+            all_files = []
+        else:
+            all_files = self._parse_imports(code_file, code)
+        all_read_files = None
         all_notes = []
         for file in all_files:
             if 'react' in file.source_file or 'vue' in file.source_file:
@@ -203,8 +350,9 @@ class Programmer(LLMAgent):
                 item for item in file.imported_items
                 if item not in ('*', 'default')
             ]
-            filename = os.path.join(self.output_dir, file.source_file)
-            if not os.path.exists(filename):
+            is_dir, resolved = self._resolve_source(self._out
+                                                    + file.source_file)
+            if not is_dir and resolved is None:
                 if file.source_file in self.all_code_files:
                     all_notes.append(
                         f'The dependency you import: {file.source_file} does not exist, '
@@ -213,20 +361,22 @@ class Programmer(LLMAgent):
                     all_notes.append(
                         f'The dependency you import: {file.source_file} is not in the code plan, '
                         f'stop importing it.')
-            elif os.path.isfile(filename):
+            elif not is_dir:
+                if all_read_files is None:
+                    all_read_files = self._ingest_read_files(messages)
                 if file.source_file not in all_read_files:
                     all_notes.append(
                         f'Extra file {file.source_file} content in imports:\n{read_file(file.source_file)}'
                     )
-            elif os.path.isdir(filename):
-                index_file_path = self.find_index_file(filename)
-                if index_file_path:
-                    index_file_path = str(
-                        Path(index_file_path).relative_to(self.output_dir))
-                    if index_file_path not in all_read_files:
-                        all_notes.append(
-                            f'Extra file {index_file_path} content in imports:\n{read_file(index_file_path)}'
-                        )
+            elif resolved:
+                index_file_path = str(
+                    Path(resolved).relative_to(self.output_dir))
+                if all_read_files is None:
+                    all_read_files = self._ingest_read_files(messages)
+                if index_file_path not in all_read_files:
+                    all_notes.append(
+                        f'Extra file {index_file_path} content in imports:\n{read_file(index_file_path)}'
+                    )
 
         if all_notes:
             all_notes = '\n'.join(all_notes)
@@ -235,9 +385,10 @@ class Programmer(LLMAgent):
                             f'Correct the errors and regenerate the code:\n')
             messages.append(Message(role='user', content=user_content))
         else:
-            messages.pop(-1)
             user_content = f'Generate the code based on the beginning:\n{code}'
-            messages.append(Message(role='user', content=user_content))
+            # Replace the assistant turn with a fresh user message; reusing
+            # the object would carry its reasoning and usage fields along
+            messages[-1] = Message(role='user', content=user_content)
         self.stop_nothing()
 
     async def _incremental_check(self, code_file: str, partial_code: str):
@@ -270,16 +421,32 @@ class Programmer(LLMAgent):
                     break
             return result
 
+    def _resolve_source(self, full_path):
+        """Resolve an import target to (is a directory, file or None).
+
+        Directories resolve to their index file. Results are shared by the
+        Programmers of a run until a file may have been created.
+        """
+        generation = self.shared_lsp_context.get('generation', 0)
+        entry = self.shared_lsp_context.get('resolved_paths')
+        if entry is None or entry[0] != generation:
+            entry = self.shared_lsp_context['resolved_paths'] = (generation,
+                                                                 {})
+        resolved = entry[1].get(full_path)
+        if resolved is None:
+            if os.path.isfile(full_path):
+                resolved = (False, full_path)
+            elif os.path.isdir(full_path):
+                resolved = (True, self.find_index_file(full_path))
+            else:
+                resolved = (False, None)
+            entry[1][full_path] = resolved
+        return resolved
+
     async def _after_import_check(self, code_file: str,
                                   partial_code: str) -> Optional[str]:
         errors = []
-        partial_code = partial_code.split('\n')
-        comments = ['*', '#', '-', '%', '/']
-        contents = [
-            c for c in partial_code
-            if not any(c.strip().startswith(cm) for cm in comments)
-        ]
-        partial_code = '\n'.join(contents)
+        partial_code = _strip_comment_lines(partial_code)
         all_imports: List[ImportInfo] = parse_imports(code_file, partial_code,
                                                       self.output_dir)
 
@@ -294,29 +461,23 @@ class Programmer(LLMAgent):
             ]
 
             if not os.path.isabs(source_file):
-                full_path = os.path.join(self.output_dir, source_file)
+                full_path = self._out + source_file
             else:
                 full_path = source_file
 
             # 1. Check file existence
-            if not os.path.isfile(full_path):
-                if os.path.isdir(full_path):
-                    index_file_path = self.find_index_file(full_path)
-                    index_found = index_file_path is not None
-
-                    if not index_found:
-                        errors.append(
-                            f'Import error in {code_file}:\n'
-                            f"  Directory '{source_file}' exists but has no index file (__init__.py, index.ts, etc.)\n"
-                            f'  Statement: {info.raw_statement}\n')
-                        continue
-                    else:
-                        full_path = index_file_path
+            is_dir, full_path = self._resolve_source(full_path)
+            if full_path is None:
+                if is_dir:
+                    errors.append(
+                        f'Import error in {code_file}:\n'
+                        f"  Directory '{source_file}' exists but has no index file (__init__.py, index.ts, etc.)\n"
+                        f'  Statement: {info.raw_statement}\n')
                 else:
                     errors.append(f'Import error in {code_file}:\n'
                                   f"  File '{source_file}' does not exist\n"
                                   f'  Statement: {info.raw_statement}\n')
-                    continue
+                continue
 
             # 2. Check if imported symbols exist in the file
             if info.import_type in ('side-effect', 'default', 'namespace'):
@@ -325,12 +486,16 @@ class Programmer(LLMAgent):
             if not info.imported_items or info.imported_items == ['*']:
                 continue
 
-            with open(full_path, 'r', encoding='utf-8') as f:
-                file_content = f.read()
+            symbols = _source_symbols(full_path)
 
             missing_items = []
             for item in info.imported_items:
-                if item not in file_content:
+                if _IDENTIFIER_RE.fullmatch(item):
+                    found = item in symbols
+                else:
+                    # Not a plain name, fall back to a text search
+                    found = item in _read_source(full_path)
+                if not found:
                     missing_items.append(item)
 
             if missing_items:
@@ -355,40 +520,34 @@ class Programmer(LLMAgent):
         if code_file.endswith('.vue'):
             return None
 
-        lsp_lock = self.shared_lsp_context.get('lsp_lock')
-        if lsp_lock is None:
-            lsp_lock = asyncio.Lock()
-            self.shared_lsp_context['lsp_lock'] = lsp_lock
-
-        async with lsp_lock:
-            file_ext = os.path.splitext(code_file)[1].lower()
-            lang = None
-            for key, value in LSPCodeServer.language_mapping.items():
-                if file_ext in value:
-                    lang = key
-                    break
+        file_ext = os.path.splitext(code_file)[1].lower()
+        lang = None
+        for key, value in LSPCodeServer.language_mapping.items():
+            if file_ext in value:
+                lang = key
+                break
 
-            if lang is None:
-                return None
+        if lang is None:
+            return None
 
-            lsp_server = lsp_servers.get(lang)
-            if not lsp_server:
-                logger.debug(f'No LSP server initialized for {lang}')
-                return None
+        lsp_server = lsp_servers.get(lang)
+        if not lsp_server:
+            logger.debug(f'No LSP server initialized for {lang}')
+            return None
 
-            return await lsp_server.call_tool(
-                'lsp_code_server',
-                tool_name='update_and_check',
-                tool_args={
-                    'file_path': code_file,
-                    'content': partial_code,
-                    'language': lang
-                })
+        # Checks of one language queue up while its server is busy and are
+        # sent together, servers of other languages run meanwhile
+        lsp_batchers = self.shared_lsp_context.setdefault('lsp_batchers', {})
+        lsp_batcher = lsp_batchers.get(lang)
+        if lsp_batcher is None:
+            lsp_batcher = LSPCheckBatcher(lsp_server, lang)
+            lsp_batchers[lang] = lsp_batcher
+        return await lsp_batcher.check(code_file, partial_code)
 
     def filter_code_files(self):
         code_files = []
         for code_file in self.code_files:
-            if not os.path.exists(os.path.join(self.output_dir, code_file)):
+            if not os.path.exists(self._out + code_file):
                 code_files.append(code_file)
         self.code_files = code_files
 
@@ -405,21 +564,45 @@ class Programmer(LLMAgent):
                     f"Unchecked file {key} still have problem:\n{self.unchecked_issues.get('key')}\n"
                     f'But the checking limit has reached.')
 
+    def _save_code(self, filename, code):
+        """Write code unless another Programmer created the file first.
+
+        Returns whether the file was written and the code now in it.
+        """
+        path = os.path.join(self.output_dir, filename)
+        dir_name = os.path.dirname(path)
+        if dir_name not in self._made_dirs:
+            os.makedirs(dir_name, exist_ok=True)
+            self._made_dirs.add(dir_name)
+        # An exclusive create claims the path atomically, so whichever
+        # Programmer gets there first writes it and no lock file is needed
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+        except FileExistsError:
+            with open(path, 'r') as f:
+                return False, f.read()
+        with os.fdopen(fd, 'w') as f:
+            f.write(code)
+        return True, code
+
     async def after_tool_call(self, messages: List[Message]):
-        is_prepare = len(messages[-1].tool_calls
-                         or []) > 0 or messages[-1].role != 'assistant'
-        is_code_finish = '<result>' in messages[
-            -1].content and '</result>' in messages[
-                -1].content and not is_prepare
+        message = messages[-1]
+        has_open = '<result>' in message.content
+        has_close = has_open and '</result>' in message.content
+        is_prepare = len(message.tool_calls
+                         or []) > 0 or message.role != 'assistant'
+        is_code_finish = has_open and has_close and not is_prepare
         is_import = (
             self.is_stop_imports() and not is_code_finish and not is_prepare
-            and '<result>' in messages[-1].content
-            and '</result>' not in messages[-1].content)
-        is_check = messages[-1].role == 'assistant' and len(
-            messages[-1].tool_calls or []) == 0 and not is_import
-        message = messages[-1]
+            and has_open and not has_close)
+        is_check = message.role == 'assistant' and len(
+            message.tool_calls or []) == 0 and not is_import
         all_issues = []
 
+        if is_prepare:
+            # Tools may have written project files
+            self._bump_generation()
+
         if is_import:
             self._before_import_check(messages)
 
@@ -428,40 +611,42 @@ class Programmer(LLMAgent):
             # Saving code
             result, remaining_text = extract_code_blocks(message.content)
             if result:
-                _response = remaining_text
-                saving_result = ''
+                _response = [remaining_text]
+                saving_result = []
                 for r in result:
-                    path = r['filename']
-                    code = r['code']
-
-                    path = os.path.join(self.output_dir, path)
-
-                    lock_dir = os.path.join(self.output_dir, DEFAULT_LOCK_DIR)
-
-                    with file_lock(lock_dir, r['filename']):
-                        new_file = not os.path.exists(path)
-                        if new_file:
-                            os.makedirs(os.path.dirname(path), exist_ok=True)
-                            with open(path, 'w') as f:
-                                f.write(code)
-                            self.add_unchecked_file(r['filename'])
-                        else:
-                            with open(path, 'r') as f:
-                                code = f.read()
-                        _response += f'\n<result>{path.split(".")[-1]}: {r["filename"]}\n{code}\n</result>\n'
-                    saving_result += f'Save file <{r["filename"]}> successfully\n'
-                message.content = _response
-                messages.append(Message(role='user', content=saving_result))
+                    path = self._out + r['filename']
+                    # Disk IO must not block the event loop shared by the
+                    # sibling Programmers
+                    new_file, code = await asyncio.to_thread(
+                        self._save_code, r['filename'], r['code'])
+                    if new_file:
+                        self._bump_generation()
+                        self.add_unchecked_file(r['filename'])
+                    _response.append(
+                        f'\n<result>{path.split(".")[-1]}: {r["filename"]}\n{code}\n</result>\n'
+                    )
+                    saving_result.append(
+                        f'Save file <{r["filename"]}> successfully\n')
+                message.content = ''.join(_response)
+                messages.append(
+                    Message(role='user', content=''.join(saving_result)))
 
         if is_check:
             # After checking when fix ended or write ended
-            for uncheck_file in list(self.unchecked_files.keys()):
-                with open(os.path.join(self.output_dir, uncheck_file),
-                          'r') as f:
-                    _code = f.read()
-                lsp_feedback = await self._incremental_check(
-                    uncheck_file, _code)
-                lsp_feedback = lsp_feedback.strip()
+
+            async def _check(uncheck_file):
+                # Often unchanged since the previous check round
+                _code = await asyncio.to_thread(_read_source,
+                                                self._out + uncheck_file)
+                feedback = await self._incremental_check(uncheck_file, _code)
+                return feedback.strip()
+
+            # LSP checks of one language are batched, other languages and
+            # the import checks overlap
+            uncheck_files = list(self.unchecked_files.keys())
+            feedbacks = await asyncio.gather(
+                *[_check(uncheck_file) for uncheck_file in uncheck_files])
+            for uncheck_file, lsp_feedback in zip(uncheck_files, feedbacks):
                 if lsp_feedback:
                     all_issues.append(f'❎Issues in {uncheck_file}:'
                                       + lsp_feedback)
@@ -530,36 +715,117 @@ class FileRelation:
     deps: Set[str] = dataclasses.field(default_factory=set)
 
 
+_LANGUAGE_KEYWORDS = {
+    **dict.fromkeys([
+        'typescript', 'javascript', 'react', 'node', 'npm', 'html'
+    ], 'typescript'),
+    **dict.fromkeys(['python', 'django', 'flask', 'fastapi'], 'python'),
+    **dict.fromkeys(['java ', 'java\n', 'spring', 'maven', 'gradle'], 'java'),
+}
+_LANGUAGE_COUNT = len(set(_LANGUAGE_KEYWORDS.values()))
+# A lookahead tries every offset, so keywords are still found as plain
+# substrings, even inside one another
+_LANGUAGE_KEYWORD_RE = re.compile(
+    '(?=(' + '|'.join(map(re.escape, _LANGUAGE_KEYWORDS)) + '))')
+
+# The plan helpers below are shared with RefineAgent
+
+
+def refresh_file_status(output_dir,
+                        file_relation,
+                        desc_by_name=None,
+                        exists=None):
+    """Add every planned file to file_relation and refresh its done flag.
+
+    desc_by_name maps the planned files to their descriptions in plan
+    order, it is read from file_design.txt if not given. exists checks a
+    planned file, os.path.exists under output_dir by default.
+    """
+    if desc_by_name is None:
+        with open(os.path.join(output_dir, 'file_design.txt')) as f:
+            desc_by_name = {
+                file['name']: file['description']
+                for module in _json_loads(f.read()) for file in module['files']
+            }
+    if exists is None:
+
+        def exists(file_name):
+            return os.path.exists(os.path.join(output_dir, file_name))
+
+    for file_name, description in desc_by_name.items():
+        relation = file_relation.get(file_name)
+        if relation is None:
+            relation = file_relation[file_name] = FileRelation(
+                name=file_name, description=description)
+        relation.done = exists(file_name)
+
+
+def file_information(output_dir, file_relation, add_output_dir=False):
+    """Build the tasks.txt text from the status of the planned files"""
+    lines = ['Files in architectural build order:\n']
+    for file, relation in file_relation.items():
+        if add_output_dir:
+            file = os.path.join(output_dir, file)
+        if relation.done:
+            lines.append(f'{file}: ✅Built\n')
+        else:
+            lines.append(f'{file}: ❌Not built\n')
+    return ''.join(lines)
+
+
+def write_tasks(output_dir, file_info):
+    """Replace tasks.txt whole, so readers never see it half written"""
+    tasks_file = os.path.join(output_dir, 'tasks.txt')
+    with open(tasks_file + '.tmp', 'w') as f:
+        f.write(file_info)
+    os.replace(tasks_file + '.tmp', tasks_file)
+
+
 class CodingAgent(CodeAgent):
 
     def __init__(self, config, tag, trust_remote_code, **kwargs):
         super().__init__(config, tag, trust_remote_code, **kwargs)
         # Shared LSP context across all Programmers
         self.shared_lsp_context = {}
-
-    async def _init_lsp_servers(self):
-        framework_file = os.path.join(self.output_dir, 'framework.txt')
-        if not os.path.exists(framework_file):
-            logger.info('framework.txt not found, skipping LSP initialization')
-            return
-
-        with open(framework_file, 'r') as f:
-            framework = f.read().lower()
-
-        # Detect all languages in the project
+        # Max Programmers writing at the same time
+        self.max_workers = getattr(self.config, 'max_workers', 5)
+        # Wipe the LSP caches at start and end even for an unchanged project
+        self.force_lsp_rebuild = getattr(self.config, 'force_lsp_rebuild',
+                                         False)
+        # Parsed file_order.txt / file_design.txt, loaded in execute_code
+        self._file_order = []
+        self._file_design = []
+        # file name -> description, in file_design.txt order
+        self._desc_by_name = {}
+        # st_mtime_ns of the parsed file_design.txt
+        self._design_mtime = None
+        # All files of file_order.txt, shared with every Programmer
+        self._all_code_files = []
+        # directory -> names in it, only files written by Programmers change it
+        self._dir_cache = {}
+        self._programmer_config = None
+        self._out = os.path.join(self.output_dir, '')
+        # Last content written to tasks.txt
+        self._tasks_info = None
+        # Background task writing tasks.txt, None when idle
+        self._tasks_writer = None
+
+    async def _init_lsp_servers(self, framework=None):
+        if framework is None:
+            framework_file = os.path.join(self.output_dir, 'framework.txt')
+            if not os.path.exists(framework_file):
+                logger.info(
+                    'framework.txt not found, skipping LSP initialization')
+                return
+            framework = await asyncio.to_thread(_read_text, framework_file)
+        framework = framework.lower()
+
+        # Detect all languages in the project with one scan of the text
         detected_languages = set()
-
-        if any(kw in framework for kw in
-               ['typescript', 'javascript', 'react', 'node', 'npm', 'html']):
-            detected_languages.add('typescript')
-
-        if any(kw in framework
-               for kw in ['python', 'django', 'flask', 'fastapi']):
-            detected_languages.add('python')
-
-        if any(kw in framework
-               for kw in ['java ', 'java\n', 'spring', 'maven', 'gradle']):
-            detected_languages.add('java')
+        for match in _LANGUAGE_KEYWORD_RE.finditer(framework):
+            detected_languages.add(_LANGUAGE_KEYWORDS[match.group(1)])
+            if len(detected_languages) == _LANGUAGE_COUNT:
+                break
 
         if not detected_languages:
             logger.info('No supported languages detected in framework.txt')
@@ -570,19 +836,23 @@ class CodingAgent(CodeAgent):
         )
 
         # Initialize LSP server for each detected language
+        # The caches of the previous run are kept if it ended cleanly and
+        # no indexed file changed since
+        reuse_caches = False
+        if not self.force_lsp_rebuild:
+            files_hash = await asyncio.to_thread(
+                LSPCodeServer.project_state_hash, self.output_dir)
+            reuse_caches = await asyncio.to_thread(
+                LSPCodeServer.lsp_state_matches, self.output_dir, files_hash)
         lsp_config = DictConfig({
             'workspace_dir': self.output_dir,
-            'output_dir': self.output_dir
+            'output_dir': self.output_dir,
+            'reuse_lsp_caches': reuse_caches
         })
 
-        lsp_servers = {}
-        for lang in detected_languages:
-            lsp_server = LSPCodeServer(lsp_config)
+        async def _start(lang, lsp_server):
             await lsp_server.connect()
-            lsp_servers[lang] = lsp_server
             logger.info(f'LSP Code Server created for {lang}')
-
-        for lang, lsp_server in lsp_servers.items():
             logger.info(f'Building LSP index for {lang}...')
             await lsp_server.call_tool(
                 'lsp_code_server',
@@ -593,25 +863,49 @@ class CodingAgent(CodeAgent):
                 })
             logger.info(f'LSP index built for {lang}')
 
+        # Creating a server wipes the LSP cache directories, so create them
+        # all before any process starts
+        lsp_servers = {
+            lang: LSPCodeServer(lsp_config)
+            for lang in detected_languages
+        }
+        # Each language has its own server process, index them concurrently
+        await asyncio.gather(*[
+            _start(lang, lsp_server)
+            for lang, lsp_server in lsp_servers.items()
+        ])
+
         self.shared_lsp_context['lsp_servers'] = lsp_servers
         self.shared_lsp_context['project_languages'] = detected_languages
         logger.info('LSP servers ready for use')
 
     async def _cleanup_lsp_servers(self):
         lsp_servers = self.shared_lsp_context.get('lsp_servers', {})
-        if lsp_servers:
-            for lang, lsp_server in lsp_servers.items():
-                try:
-                    await lsp_server.cleanup()
-                    lsp_server.cleanup_lsp_index_dirs()
-                except Exception:  # noqa
-                    pass
+
+        async def _stop(lsp_server):
+            try:
+                await lsp_server.cleanup()
+                return True
+            except Exception:  # noqa
+                return False
+
+        if not lsp_servers:
+            return
+        stopped = await asyncio.gather(
+            *[_stop(lsp_server) for lsp_server in lsp_servers.values()])
+        if self.force_lsp_rebuild or not all(stopped):
+            next(iter(lsp_servers.values())).cleanup_lsp_index_dirs()
+            return
+        # Record the files the caches now reflect, one walk for all servers
+        files_hash = await asyncio.to_thread(LSPCodeServer.project_state_hash,
+                                             self.output_dir)
+        await asyncio.to_thread(LSPCodeServer.save_lsp_index_state,
+                                self.output_dir, files_hash)
 
     async def write_code(self, topic, user_story, framework, protocol,
                          file_order, name, description, index, last_batch,
                          siblings, next_batch):
         logger.info(f'Writing {name}')
-        _config = deepcopy(self.config)
         messages = [
             Message(role='system', content=self.config.prompt.system),
             Message(
@@ -629,138 +923,180 @@ class CodingAgent(CodeAgent):
                 f'Next batch planned:\n{next_batch}\n'),
         ]
 
-        _config = deepcopy(self.config)
-        _config.save_history = True
-        _config.load_cache = False
+        if self._programmer_config is None:
+            # Programmer copies its config in _validate_config, so a single
+            # template serves all files instead of a deepcopy per file
+            self._programmer_config = deepcopy(self.config)
+            self._programmer_config.save_history = True
+            self._programmer_config.load_cache = False
         programmer = Programmer(
-            _config,
+            self._programmer_config,
             tag=f'programmer-{name.replace(os.sep, "-")}',
             trust_remote_code=True,
             code_file=name,
+            all_code_files=self._all_code_files,
             shared_lsp_context=self.shared_lsp_context)  # Pass shared context
         await programmer.run(messages)
 
     async def execute_code(self, inputs, **kwargs):
-        await self._init_lsp_servers()
-        with open(os.path.join(self.output_dir, 'topic.txt')) as f:
-            topic = f.read()
-        with open(os.path.join(self.output_dir, 'user_story.txt')) as f:
-            user_story = f.read()
-        with open(os.path.join(self.output_dir, 'framework.txt')) as f:
-            framework = f.read()
-        with open(os.path.join(self.output_dir, 'protocol.txt')) as f:
-            protocol = f.read()
-        with open(os.path.join(self.output_dir, 'file_order.txt')) as f:
-            file_order = f.read()
+        (topic, user_story, framework, protocol,
+         file_order) = await asyncio.gather(*[
+             asyncio.to_thread(_read_text,
+                               os.path.join(self.output_dir, file_name))
+             for file_name in ('topic.txt', 'user_story.txt', 'framework.txt',
+                               'protocol.txt', 'file_order.txt')
+         ])
+        await self._init_lsp_servers(framework)
+
+        # Parse the plan once for all passes
+        self._file_order = _json_loads(file_order)
+        self._all_code_files = [
+            file for group in self._file_order for file in group['files']
+        ]
+        self._design_mtime = None
+        self._load_design()
 
         file_orders = self.construct_file_orders()
         file_relation = OrderedDict()
-        self.refresh_file_status(file_relation)
         shutil.rmtree(
             os.path.join(self.output_dir, 'locks'), ignore_errors=True)
 
         for idx, files in enumerate(file_orders):
-            while True:
-                files = self.filter_done_files(files)
-                files = self.find_description(files)
-                self.construct_file_information(file_relation)
-                if not files:
-                    break
+            self._load_design()
+            self._refresh_and_dump(file_relation)
+            pending = self.filter_done_files(files)
+            if not pending:
+                continue
 
-                if idx == 0:
-                    last_batch = 'You are the first batch.'
-                    next_batch = '\n'.join(file_orders[idx + 1])
-                if idx == len(file_orders) - 1:
-                    last_batch = '\n'.join(file_orders[idx - 1])
-                    next_batch = 'You are the last batch.'
-                else:
-                    last_batch = '\n'.join(file_orders[idx - 1])
-                    next_batch = '\n'.join(file_orders[idx + 1])
-
-                tasks = [
-                    self.write_code(
-                        topic,
-                        user_story,
-                        framework,
-                        protocol,
-                        file_order,
-                        name,
-                        description,
-                        index=idx,
-                        last_batch=last_batch,
-                        siblings='\n'.join(set(files) - {name}),
-                        next_batch=next_batch)
-                    for name, description in files.items()
-                ]
-
-                await asyncio.gather(*tasks, return_exceptions=True)
-
-            self.refresh_file_status(file_relation)
-
-        self.construct_file_information(file_relation)
+            if idx == 0:
+                last_batch = 'You are the first batch.'
+                next_batch = '\n'.join(file_orders[idx + 1])
+            if idx == len(file_orders) - 1:
+                last_batch = '\n'.join(file_orders[idx - 1])
+                next_batch = 'You are the last batch.'
+            else:
+                last_batch = '\n'.join(file_orders[idx - 1])
+                next_batch = '\n'.join(file_orders[idx + 1])
+
+            descriptions = self.find_description(pending)
+            queue = asyncio.Queue()
+            for name in pending:
+                queue.put_nowait(name)
+            pending = set(pending)
+
+            async def _worker():
+                # Workers share this event loop and pick up files as they
+                # become free; a file that was not written is queued again
+                # right away instead of waiting for the slowest sibling
+                while True:
+                    name = await queue.get()
+                    try:
+                        await self.write_code(
+                            topic,
+                            user_story,
+                            framework,
+                            protocol,
+                            file_order,
+                            name,
+                            descriptions[name],
+                            index=idx,
+                            last_batch=last_batch,
+                            siblings='\n'.join(pending - {name}),
+                            next_batch=next_batch)
+                    except Exception as e:
+                        logger.error(f'Writing {name} failed: {e}')
+                    if os.path.exists(self._out + name):
+                        pending.discard(name)
+                        file_relation[name].done = True
+                        self._write_tasks(
+                            file_information(self.output_dir, file_relation))
+                    else:
+                        queue.put_nowait(name)
+                    queue.task_done()
+
+            workers = [
+                asyncio.create_task(_worker())
+                for _ in range(min(self.max_workers, len(pending)))
+            ]
+            try:
+                await queue.join()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+            self._dir_cache.clear()
+
+        self._refresh_and_dump(file_relation)
+        if self._tasks_writer is not None:
+            await self._tasks_writer
         await self._cleanup_lsp_servers()
         return inputs
 
-    def construct_file_orders(self):
-        with open(os.path.join(self.output_dir, 'file_order.txt')) as f:
-            file_order = json.load(f)
+    def _exists(self, file_name):
+        """Check a planned file with one cached listing per directory."""
+        dir_name, base_name = os.path.split(file_name)
+        names = self._dir_cache.get(dir_name)
+        if names is None:
+            try:
+                with os.scandir(self._out + dir_name) as entries:
+                    names = frozenset(entry.name for entry in entries)
+            except OSError:
+                names = frozenset()
+            self._dir_cache[dir_name] = names
+        return base_name in names
+
+    def _load_design(self):
+        """Parse file_design.txt again only if it changed on disk."""
+        design_file = os.path.join(self.output_dir, 'file_design.txt')
+        mtime = os.stat(design_file).st_mtime_ns
+        if mtime == self._design_mtime:
+            return
+        with open(design_file) as f:
+            self._file_design = _json_loads(f.read())
+        self._desc_by_name = {
+            file['name']: file['description']
+            for module in self._file_design for file in module['files']
+        }
+        self._design_mtime = mtime
 
+    def construct_file_orders(self):
         file_orders = []
-        for files in file_order:
+        for files in self._file_order:
             file_orders.append(files['files'])
         return file_orders
 
     def find_description(self, files):
-        file_desc = {file: '' for file in files}
-        with open(os.path.join(self.output_dir, 'file_design.txt')) as f:
-            file_design = json.load(f)
-
-        for module in file_design:
-            files = module['files']
-            for file in files:
-                name = file['name']
-                description = file['description']
-                if name in file_desc:
-                    file_desc[name] = description
-        return file_desc
+        return {file: self._desc_by_name.get(file, '') for file in files}
 
     def filter_done_files(self, file_group):
-        output = []
-        with open(os.path.join(self.output_dir, 'file_design.txt')) as f:
-            file_designs = json.load(f)
-
-        for file_design in file_designs:
-            files = file_design['files']
-            for file in files:
-                file_name = file['name']
-                file_path = os.path.join(self.output_dir, file_name)
-                if file_name in file_group and not os.path.exists(file_path):
-                    output.append(file_name)
-        return output
-
-    def refresh_file_status(self, file_relation):
-        with open(os.path.join(self.output_dir, 'file_design.txt')) as f:
-            file_designs = json.load(f)
-
-        for file_design in file_designs:
-            files = file_design['files']
-            for file in files:
-                file_name = file['name']
-                description = file['description']
-                file_path = os.path.join(self.output_dir, file_name)
-                if file_name not in file_relation:
-                    file_relation[file_name] = FileRelation(
-                        name=file_name, description=description)
-                file_relation[file_name].done = os.path.exists(file_path)
-
-    def construct_file_information(self, file_relation, add_output_dir=False):
-        file_info = 'Files in architectural build order:\n'
-        for file, relation in file_relation.items():
-            if add_output_dir:
-                file = os.path.join(self.output_dir, file)
-            if relation.done:
-                file_info += f'{file}: ✅Built\n'
-            else:
-                file_info += f'{file}: ❌Not built\n'
-        with open(os.path.join(self.output_dir, 'tasks.txt'), 'w') as f:
-            f.write(file_info)
+        file_group = set(file_group)
+        return [
+            file_name for file_name in self._desc_by_name
+            if file_name in file_group and not self._exists(file_name)
+        ]
+
+    def _write_tasks(self, file_info):
+        # Most refreshes change nothing, skip rewriting an identical file
+        if file_info == self._tasks_info:
+            return
+        self._tasks_info = file_info
+        # tasks.txt is only a progress report, write it off the event loop
+        # and let updates arriving meanwhile collapse into the latest one
+        if self._tasks_writer is None:
+            self._tasks_writer = asyncio.get_running_loop().create_task(
+                self._flush_tasks())
+
+    async def _flush_tasks(self):
+        try:
+            written = None
+            while written is not self._tasks_info:
+                written = self._tasks_info
+                await asyncio.to_thread(write_tasks, self.output_dir, written)
+        finally:
+            self._tasks_writer = None
+
+    def _refresh_and_dump(self, file_relation):
+        """Refresh the status of every planned file and dump tasks.txt."""
+        refresh_file_status(self.output_dir, file_relation, self._desc_by_name,
+                            self._exists)
+        self._write_tasks(file_information(self.output_dir, file_relation))
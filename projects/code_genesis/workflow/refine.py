@@ -1,7 +1,7 @@
 import json
 import os
 import sys
-from coding import CodingAgent
+from coding import file_information, refresh_file_status, write_tasks
 from omegaconf import DictConfig
 from typing import List, OrderedDict
 
@@ -97,8 +97,9 @@ class RefineAgent(LLMAgent):
             file_info = f.read()
 
         file_relation = OrderedDict()
-        CodingAgent.refresh_file_status(self, file_relation)
-        CodingAgent.construct_file_information(self, file_relation, False)
+        refresh_file_status(self.output_dir, file_relation)
+        write_tasks(self.output_dir,
+                    file_information(self.output_dir, file_relation))
         messages = [
             Message(role='system', content=self.config.prompt.system),
             Message(
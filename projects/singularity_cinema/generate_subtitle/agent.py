@@ -1,32 +1,53 @@
 # Copyright (c) ModelScope Contributors. All rights reserved.
+import asyncio
+import hashlib
 import json
 import matplotlib.font_manager as fm
 import os
 import re
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from omegaconf import DictConfig
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageColor, ImageFont
 from typing import List
 
 from ms_agent.agent import CodeAgent
 from ms_agent.llm import LLM, Message, collect_response
 from ms_agent.llm.openai_llm import OpenAI
 from ms_agent.utils import get_logger
+from ms_agent.utils.utils import json_loads
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = get_logger()
 
 PUNCTUATION_OVERFLOW_ALLOWANCE = 2
+# Rasterized subtitle lines kept for reuse
+LINE_MASK_CACHE_SIZE = 256
+# Number of subtitle chunks translated per LLM call
+TRANSLATE_BATCH_SIZE = 16
 PUNCT_CHARS = r'，。！？;:,.!?;:、()[]{}"\'——“”《》<>—'
+_PUNCT_SET = frozenset(PUNCT_CHARS)
+_SENTENCE_ENDERS = frozenset('.!?。！？')
+# Split by whitespace or punctuation, keeping single-char punctuation as tokens
+_TOKEN_SPLIT_RE = re.compile(r'(\s+|[' + re.escape(PUNCT_CHARS) + r'])')
+_ASCII_TEXT_RE = re.compile(r'^[a-zA-Z0-9\s.,!?;:\'"()-]+$')
 
 
 def _is_punct(tok: str) -> bool:
-    return len(tok) == 1 and tok in PUNCT_CHARS
+    return len(tok) == 1 and tok in _PUNCT_SET
 
 
 def _tokenize_text(text: str) -> List[str]:
     if not text:
         return []
-    # Split by whitespace or punctuation, keeping single-char punctuation as tokens
-    tokens = re.split(r'(\s+|[' + re.escape(PUNCT_CHARS) + r'])', text)
+    tokens = _TOKEN_SPLIT_RE.split(text)
     tokens = [t for t in tokens if t and not t.isspace()]
     return tokens
 
@@ -90,38 +111,76 @@ class GenerateSubtitle(CodeAgent):
         super().__init__(config, tag, trust_remote_code, **kwargs)
         self.work_dir = getattr(self.config, 'output_dir', 'output')
         self.llm: OpenAI = LLM.from_config(self.config)
+        self.num_parallel = getattr(self.config, 'llm_num_parallel', 10)
         self.subtitle_translate = getattr(self.config, 'subtitle_translate',
                                           None)
         self.subtitle_dir = os.path.join(self.work_dir, 'subtitles')
         os.makedirs(self.subtitle_dir, exist_ok=True)
+        self.translation_cache_dir = os.path.join(self.work_dir, 'trans_cache')
+        os.makedirs(self.translation_cache_dir, exist_ok=True)
+        self._translation_cache = {}
         self.fonts = self.config.fonts
+        self._font_path = None
+        # FreeType faces are not thread-safe, keep one font cache per thread
+        self._font_local = threading.local()
+        # (line, font size) -> (mask, offset), shared by the render threads
+        self._line_masks = OrderedDict()
+        self._line_masks_lock = threading.Lock()
 
     async def execute_code(self, messages, **kwargs):
         if not self.config.use_subtitle:
             return messages
-        with open(os.path.join(self.work_dir, 'segments.txt'), 'r') as f:
-            segments = json.load(f)
+        with open(os.path.join(self.work_dir, 'segments.txt'), 'rb') as f:
+            segments = orjson.loads(
+                f.read()) if orjson is not None else json.load(f)
         logger.info('Generating subtitles.')
+        jobs = []
         for i, seg in enumerate(segments):
             text = seg.get('content', '')
             text_chunks = self.split_text_to_chunks(text)
             for j, chunk_text in enumerate(text_chunks):
-                subtitle = None
-                if self.subtitle_translate:
-                    subtitle = await self.translate_text(
-                        chunk_text, self.subtitle_translate)
-
                 output_file = os.path.join(
                     self.subtitle_dir, f'bilingual_subtitle_{i + 1}_{j}.png')
+                # Already rendered on a previous run, skip the translation too
                 if os.path.exists(output_file):
                     continue
+                jobs.append((chunk_text, output_file))
+        if not jobs:
+            return messages
 
-                self.create_bilingual_subtitle_image(
-                    source=chunk_text,
-                    target=subtitle,
-                    output_file=output_file,
-                    width=1720,
-                    height=180)
+        subtitles = [None] * len(jobs)
+        if self.subtitle_translate:
+            semaphore = asyncio.Semaphore(self.num_parallel)
+
+            async def _translate(batch):
+                async with semaphore:
+                    return await self.translate_batch(batch,
+                                                      self.subtitle_translate)
+
+            texts = [chunk_text for chunk_text, _ in jobs]
+            batches = await asyncio.gather(
+                *(_translate(texts[k:k + TRANSLATE_BATCH_SIZE])
+                  for k in range(0, len(texts), TRANSLATE_BATCH_SIZE)))
+            subtitles = [subtitle for batch in batches for subtitle in batch]
+
+        # Text rendering and PNG encoding release the GIL, render in threads
+        loop = asyncio.get_running_loop()
+        max_workers = min(len(jobs), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                loop.run_in_executor(
+                    executor,
+                    partial(
+                        self.create_bilingual_subtitle_image,
+                        source=chunk_text,
+                        target=subtitle,
+                        output_file=output_file,
+                        width=1720,
+                        height=180))
+                for (chunk_text,
+                     output_file), subtitle in zip(jobs, subtitles)
+            ]
+            await asyncio.gather(*futures)
         return messages
 
     def split_text_to_chunks(self, text, max_len: int = 30):
@@ -132,9 +191,34 @@ class GenerateSubtitle(CodeAgent):
         chunks = _chunk_tokens(tokens, max_len)
         return _clean_chunks(chunks, max_len)
 
-    async def translate_text(self, text, to_lang):
-
-        prompt = f"""You are a professional translation expert specializing in accurately and fluently translating text into {to_lang}.
+    def _translation_cache_file(self, text, to_lang):
+        key = hashlib.sha256(f'{to_lang}\0{text}'.encode('utf-8')).hexdigest()
+        return os.path.join(self.translation_cache_dir, f'{key}.json')
+
+    def _save_translation(self, cache_file, translation):
+        fd, tmp_path = tempfile.mkstemp(
+            dir=self.translation_cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'translation': translation}, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_file)
+
+    def _load_translation(self, cache_file):
+        if cache_file in self._translation_cache:
+            return self._translation_cache[cache_file]
+        if os.path.exists(cache_file):
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                translation = json.load(f)['translation']
+            self._translation_cache[cache_file] = translation
+            return translation
+        return None
+
+    def _store_translation(self, cache_file, translation):
+        self._translation_cache[cache_file] = translation
+        self._save_translation(cache_file, translation)
+
+    @staticmethod
+    def _translation_prompt(to_lang):
+        return f"""You are a professional translation expert specializing in accurately and fluently translating text into {to_lang}.
 
 ## Skills
 
@@ -145,30 +229,102 @@ class GenerateSubtitle(CodeAgent):
 - Accurately convey all information from the original text, avoiding arbitrary additions or deletions.
 - Only provide services related to {to_lang} translation.
 - Output only the translation result without any explanations.
-
-Now translate:
 """ # noqa
+
+    async def _generate(self, messages):
+        # generate() is blocking, run it in a thread so translations overlap
+        _response_message = await asyncio.to_thread(
+            lambda: collect_response(self.llm.generate(messages)))
+        return _response_message.content
+
+    async def translate_text(self, text, to_lang):
+        cache_file = self._translation_cache_file(text, to_lang)
+        translation = self._load_translation(cache_file)
+        if translation is not None:
+            return translation
+
+        prompt = self._translation_prompt(to_lang) + '\nNow translate:\n'
         messages = [
             Message(role='system', content=prompt),
             Message(role='user', content=text),
         ]
+        translation = await self._generate(messages)
+        self._store_translation(cache_file, translation)
+        return translation
 
-        _response_message = collect_response(self.llm.generate(messages))
-        return _response_message.content
+    async def translate_batch(self, texts, to_lang):
+        """Translate several texts with one LLM call.
+
+        The texts are sent as a JSON object keyed by index and the model is
+        asked to answer with the same keys. Entries missing from the answer,
+        or all of them if the call fails, fall back to translate_text.
+        """
+        results = [None] * len(texts)
+        pending = {}
+        for idx, text in enumerate(texts):
+            translation = self._load_translation(
+                self._translation_cache_file(text, to_lang))
+            if translation is None:
+                pending[str(idx)] = text
+            else:
+                results[idx] = translation
+
+        translated = {}
+        if len(pending) > 1:
+            prompt = self._translation_prompt(to_lang) + (
+                '- The input is a JSON object, translate each value and '
+                'output a JSON object with exactly the same keys.\n'
+                '\nNow translate:\n')
+            messages = [
+                Message(role='system', content=prompt),
+                Message(
+                    role='user',
+                    content=json.dumps(pending, ensure_ascii=False)),
+            ]
+            try:
+                translated = json_loads(await self._generate(messages))
+                if not isinstance(translated, dict):
+                    raise ValueError('Expected a JSON object')
+            except Exception as e:
+                logger.warning(f'Batch translation failed, translating one '
+                               f'by one: {e}')
+                translated = {}
+
+        for key, text in pending.items():
+            translation = translated.get(key)
+            if isinstance(translation, str) and translation.strip():
+                self._store_translation(
+                    self._translation_cache_file(text, to_lang), translation)
+            else:
+                translation = await self.translate_text(text, to_lang)
+            results[int(key)] = translation
+        return results
 
     def get_font(self, size):
         """Get font using system font manager, same as CreateBackground agent"""
+        font_cache = getattr(self._font_local, 'cache', None)
+        if font_cache is None:
+            font_cache = self._font_local.cache = {}
+        font = font_cache.get(size)
+        if font is None:
+            font = font_cache[size] = self._load_font(size)
+        return font
+
+    def _load_font(self, size):
+        if self._font_path is not None:
+            return ImageFont.truetype(self._font_path, size)
         for font_name in self.fonts:
             try:
                 font_path = fm.findfont(fm.FontProperties(family=font_name))
-                return ImageFont.truetype(font_path, size)
+                font = ImageFont.truetype(font_path, size)
             except (OSError, ValueError):
                 continue
+            self._font_path = font_path
+            return font
         return ImageFont.load_default()
 
     def smart_wrap_text(self, text, max_lines=2, chars_per_line=50):
         """Break text into lines at sentence boundaries, never at commas."""
-        sentence_enders = '.!?。！？'
         lines = []
         pos = 0
 
@@ -181,19 +337,15 @@ Now translate:
                 lines.append(remaining)
                 break
 
-            break_pos = -1
-            for i in range(chars_per_line, 0, -1):
-                if i <= len(remaining) and remaining[i - 1] in sentence_enders:
-                    break_pos = i
-                    break
-
-            if break_pos == -1:
-                for i in range(chars_per_line, 0, -1):
-                    if i <= len(remaining) and remaining[i - 1] == ' ':
-                        break_pos = i
-                        break
+            # Break after the last sentence ender, else the last space,
+            # within the first chars_per_line characters
+            break_pos = max(
+                remaining.rfind(c, 0, chars_per_line)
+                for c in _SENTENCE_ENDERS) + 1
+            if not break_pos:
+                break_pos = remaining.rfind(' ', 0, chars_per_line) + 1
 
-            if break_pos == -1:
+            if not break_pos:
                 break_pos = min(chars_per_line, len(remaining))
 
             lines.append(remaining[:break_pos].strip())
@@ -201,60 +353,101 @@ Now translate:
 
         return lines if lines else [text]
 
-    def create_subtitle_image(self,
-                              text,
-                              width=1720,
-                              height=120,
-                              font_size=28,
-                              text_color='black',
-                              bg_color='rgba(0,0,0,0)',
-                              chars_per_line=50):
-        font = self.get_font(font_size)
+    def _get_line_mask(self, line, font_size):
+        """Rasterize a line once and reuse the mask for later draws.
+
+        Doing the layout here replaces the textbbox + draw.text pair, which
+        laid out every line twice.
+        """
+        key = (line, font_size)
+        with self._line_masks_lock:
+            cached = self._line_masks.get(key)
+            if cached is not None:
+                self._line_masks.move_to_end(key)
+                return cached
+        mask, offset = self.get_font(font_size).getmask2(line, 'L')
+        cached = (Image.frombytes('L', mask.size, bytes(mask)), offset)
+        with self._line_masks_lock:
+            self._line_masks[key] = cached
+            if len(self._line_masks) > LINE_MASK_CACHE_SIZE:
+                self._line_masks.popitem(last=False)
+        return cached
+
+    def _layout_subtitle(self, text, width, height, font_size, chars_per_line):
+        """Wrap text and pick the font size, returns the layout to draw."""
         min_font_size = 18
         max_height = 500
-        original_font_size = font_size
-        lines = []
-        while font_size >= min_font_size:
-            if font_size != original_font_size:
-                font = self.get_font(font_size)
-            lines = self.smart_wrap_text(
-                text, max_lines=2, chars_per_line=chars_per_line)
-            line_height = font_size + 8
-            total_text_height = len(lines) * line_height
-
-            all_lines_fit = True
-            for line in lines:
-                bbox = ImageDraw.Draw(Image.new('RGB', (1, 1))).textbbox(
-                    (0, 0), line, font=font)
-                line_width = bbox[2] - bbox[0]
-                if line_width > width * 0.95:
-                    all_lines_fit = False
-                    break
-
-            if total_text_height <= height and all_lines_fit:
-                break
-            elif total_text_height <= max_height and all_lines_fit:
-                break
+        # Candidate sizes shrink by 10% per step, down to min_font_size
+        sizes = []
+        size = font_size
+        while size >= min_font_size:
+            sizes.append(size)
+            size = int(size * 0.9)
+        lines = self.smart_wrap_text(
+            text, max_lines=2, chars_per_line=chars_per_line) if sizes else []
+
+        def fits(candidate_size):
+            candidate_font = self.get_font(candidate_size)
+            total_text_height = len(lines) * (candidate_size + 8)
+            # Advance width is enough to decide whether a line fits
+            return total_text_height <= max(height, max_height) and all(
+                candidate_font.getlength(line) <= width * 0.95
+                for line in lines)
+
+        # Text width shrinks with the font size, so binary-search for the
+        # largest candidate that fits instead of trying them one by one
+        lo, hi = 0, len(sizes)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if fits(sizes[mid]):
+                hi = mid
             else:
-                font_size = int(font_size * 0.9)
+                lo = mid + 1
+
+        if lo < len(sizes):
+            font_size = draw_size = sizes[lo]
+        else:
+            # Nothing fits: draw with the smallest candidate font and one more
+            # step of line-height shrink, as the linear loop used to
+            draw_size = sizes[-1] if sizes else font_size
+            font_size = size
 
         line_height = font_size + 8
         total_text_height = len(lines) * line_height
         actual_height = total_text_height + 16
-        img = Image.new('RGBA', (width, actual_height), bg_color)
-        draw = ImageDraw.Draw(img)
+        return lines, draw_size, line_height, actual_height
+
+    def _draw_subtitle(self, img, layout, top, text_color):
+        """Draw a laid out subtitle onto img, starting at row top."""
+        lines, draw_size, line_height, actual_height = layout
+        width = img.width
+        fill = ImageColor.getcolor(text_color, 'RGBA')
         y_start = 8
         for i, line in enumerate(lines):
             if not line.strip():
                 continue
 
-            bbox = draw.textbbox((0, 0), line, font=font)
-            text_width = bbox[2] - bbox[0]
+            mask, offset = self._get_line_mask(line, draw_size)
+            text_width = mask.width
             x = max(0, (width - text_width) // 2)
             y = y_start + i * line_height
 
             if y + line_height <= actual_height and x >= 0 and x + text_width <= width:
-                draw.text((x, y), line, fill=text_color, font=font)
+                img.paste(fill, (x + offset[0], top + y + offset[1]), mask)
+
+    def create_subtitle_image(self,
+                              text,
+                              width=1720,
+                              height=120,
+                              font_size=28,
+                              text_color='black',
+                              bg_color='rgba(0,0,0,0)',
+                              chars_per_line=50):
+        layout = self._layout_subtitle(text, width, height, font_size,
+                                       chars_per_line)
+        actual_height = layout[-1]
+        img = Image.new('RGBA', (width, actual_height), bg_color)
+        self._draw_subtitle(img, layout, 0, text_color)
         return img, actual_height
 
     def create_bilingual_subtitle_image(self,
@@ -266,40 +459,34 @@ Now translate:
         main_font_size = 32
         target_font_size = 22
         main_target_gap = 6
-        pattern = r'^[a-zA-Z0-9\s.,!?;:\'"()-]+$'
-        chars_per_line = 50 if not bool(re.match(pattern, source)) else 100
+        chars_per_line = 50 if not _ASCII_TEXT_RE.match(source) else 100
         if target:
-            target_chars_per_line = 50 if not bool(re.match(pattern,
-                                                            target)) else 100
+            target_chars_per_line = 50 if not _ASCII_TEXT_RE.match(
+                target) else 100
 
-        main_img, main_height = self.create_subtitle_image(
-            source,
-            width,
-            height,
-            main_font_size,
-            'black',
-            chars_per_line=chars_per_line)
+        main_layout = self._layout_subtitle(source, width, height,
+                                            main_font_size, chars_per_line)
+        main_height = main_layout[-1]
+        layouts = [(main_layout, 0, 'black')]
+        final_height = main_height
 
         if target and target.strip():
             target_chars_per_line = 100
-            target_img, target_height = self.create_subtitle_image(
-                target,
-                width,
-                height,
-                target_font_size,
-                '#404040',  # Darker gray for better visibility
-                chars_per_line=target_chars_per_line)
-            total_height = main_height + target_height + main_target_gap
-            combined_img = Image.new('RGBA', (width, total_height),
-                                     (0, 0, 0, 0))
-            combined_img.paste(main_img, (0, 0), main_img)
-            combined_img.paste(target_img, (0, main_height + main_target_gap),
-                               target_img)
-            final_img = combined_img
-            final_height = total_height
-        else:
-            final_img = main_img
-            final_height = main_height
-
-        final_img.save(output_file)
+            target_layout = self._layout_subtitle(target, width, height,
+                                                  target_font_size,
+                                                  target_chars_per_line)
+            target_top = main_height + main_target_gap
+            # Darker gray for better visibility
+            layouts.append((target_layout, target_top, '#404040'))
+            final_height = target_top + target_layout[-1]
+
+        # Draw both languages straight onto one canvas instead of rendering
+        # each into its own image and compositing them into a third
+        final_img = Image.new('RGBA', (width, final_height), (0, 0, 0, 0))
+        for layout, top, text_color in layouts:
+            self._draw_subtitle(final_img, layout, top, text_color)
+
+        # Subtitles are intermediates consumed by compose_video, favour encode
+        # speed over size: zlib level 1 is several times cheaper than 6
+        final_img.save(output_file, compress_level=1)
         return final_height
@@ -1,10 +1,16 @@
+import asyncio
+import json
 import os
 import shutil
 import tempfile
 import unittest
 from pathlib import Path
 
-from ms_agent.tools.code_server.lsp_code_server import LSPCodeServer
+from ms_agent.tools.code_server.lsp_code_server import (LSPCheckBatcher,
+                                                        LSPCodeServer,
+                                                        LSPServer,
+                                                        _frame_message,
+                                                        _text_change)
 from omegaconf import DictConfig
 
 
@@ -50,5 +56,364 @@ class TestLSP(unittest.TestCase):
         self.assertTrue(not result)
 
 
+class _FakeStdin:
+
+    def __init__(self):
+        self.sent = []
+
+    def write(self, data: bytes):
+        self.sent.append(json.loads(data.split(b'\r\n\r\n', 1)[1]))
+
+    async def drain(self):
+        pass
+
+
+def _fake_server(output_dir: str, messages: list) -> LSPServer:
+    """An LSPServer reading the given messages as the server's output"""
+    server = LSPServer(DictConfig({'output_dir': output_dir}))
+    server.process = object()
+    server.stdin = _FakeStdin()
+    server.stdout = asyncio.StreamReader()
+    for message in messages:
+        server.stdout.feed_data(_frame_message(message))
+    server.diagnostic_provider = {}
+    return server
+
+
+def _diagnostic(message: str) -> dict:
+    return {
+        'range': {
+            'start': {
+                'line': 0,
+                'character': 0
+            },
+            'end': {
+                'line': 0,
+                'character': 1
+            }
+        },
+        'severity': 1,
+        'message': message
+    }
+
+
+class TestPullDiagnostics(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, 'main.py')
+        self.uri = Path(self.file_path).resolve().as_uri()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    async def test_full_report(self):
+        diag = _diagnostic('undefined name')
+        server = _fake_server(self.tmp_dir, [{
+            'jsonrpc': '2.0',
+            'id': 1,
+            'result': {
+                'kind': 'full',
+                'resultId': 'r1',
+                'items': [diag]
+            }
+        }])
+
+        self.assertEqual(await server.pull_diagnostics(self.file_path), [diag])
+        request = server.stdin.sent[0]
+        self.assertEqual(request['method'], 'textDocument/diagnostic')
+        self.assertNotIn('previousResultId', request['params'])
+        self.assertEqual(server.diagnostic_reports[self.uri], ('r1', [diag]))
+
+    async def test_unchanged_report_reuses_previous_items(self):
+        diag = _diagnostic('undefined name')
+        server = _fake_server(self.tmp_dir, [{
+            'jsonrpc': '2.0',
+            'id': 1,
+            'result': {
+                'kind': 'full',
+                'resultId': 'r1',
+                'items': [diag]
+            }
+        }, {
+            'jsonrpc': '2.0',
+            'id': 2,
+            'result': {
+                'kind': 'unchanged',
+                'resultId': 'r1'
+            }
+        }])
+
+        await server.pull_diagnostics(self.file_path)
+        self.assertEqual(await server.pull_diagnostics(self.file_path), [diag])
+        self.assertEqual(server.stdin.sent[1]['params']['previousResultId'],
+                         'r1')
+
+    async def test_reply_after_notifications(self):
+        diag = _diagnostic('undefined name')
+        other_uri = Path(os.path.join(self.tmp_dir,
+                                      'other.py')).resolve().as_uri()
+        messages = [{
+            'jsonrpc': '2.0',
+            'method': 'window/logMessage',
+            'params': {
+                'type': 4,
+                'message': f'log {i}'
+            }
+        } for i in range(30)]
+        messages += [
+            {
+                'jsonrpc': '2.0',
+                'method': 'textDocument/publishDiagnostics',
+                'params': {
+                    'uri': other_uri,
+                    'version': 3,
+                    'diagnostics': [diag]
+                }
+            },
+            # A server request whose id collides with ours
+            {
+                'jsonrpc': '2.0',
+                'id': 1,
+                'method': 'workspace/configuration',
+                'params': {}
+            },
+            {
+                'jsonrpc': '2.0',
+                'id': 1,
+                'result': {
+                    'kind': 'full',
+                    'items': []
+                }
+            },
+        ]
+        server = _fake_server(self.tmp_dir, messages)
+
+        self.assertEqual(await server.pull_diagnostics(self.file_path), [])
+        self.assertEqual(server.diagnostics_cache[other_uri], [diag])
+        self.assertEqual(server.diagnostic_versions[other_uri], 3)
+
+    async def test_request_times_out(self):
+        server = _fake_server(self.tmp_dir, [])
+        response = await server.send_request(
+            'textDocument/diagnostic', {}, timeout=0.1)
+        self.assertIn('error', response)
+
+
+class _StubBatchServer:
+    """Records the batches LSPCheckBatcher sends"""
+
+    def __init__(self, error: Exception = None):
+        self.batches = []
+        self.error = error
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def update_and_check_batch(self, files, language):
+        self.batches.append([(f['file_path'], f['content']) for f in files])
+        await self.release.wait()
+        if self.error:
+            raise self.error
+        return [f"{f['file_path']}:{f['content']}" for f in files]
+
+
+class TestLSPCheckBatcher(unittest.IsolatedAsyncioTestCase):
+
+    async def test_repeated_path_waits_for_next_batch(self):
+        stub = _StubBatchServer()
+        batcher = LSPCheckBatcher(stub, 'python')
+
+        results = await asyncio.gather(
+            batcher.check('a.py', '1'), batcher.check('a.py', '2'),
+            batcher.check('b.py', '1'))
+
+        self.assertEqual(results, ['a.py:1', 'a.py:2', 'b.py:1'])
+        self.assertEqual(stub.batches, [[('a.py', '1'),
+                                         ('b.py', '1')], [('a.py', '2')]])
+
+    async def test_cancelled_caller_is_skipped(self):
+        stub = _StubBatchServer()
+        stub.release.clear()
+        batcher = LSPCheckBatcher(stub, 'python')
+
+        first = asyncio.create_task(batcher.check('a.py', '1'))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        cancelled = asyncio.create_task(batcher.check('b.py', '1'))
+        kept = asyncio.create_task(batcher.check('c.py', '1'))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        stub.release.set()
+
+        self.assertEqual(await first, 'a.py:1')
+        self.assertEqual(await kept, 'c.py:1')
+        self.assertEqual(stub.batches, [[('a.py', '1')], [('c.py', '1')]])
+
+    async def test_error_reaches_every_waiter(self):
+        error = RuntimeError('server died')
+        batcher = LSPCheckBatcher(_StubBatchServer(error), 'python')
+
+        results = await asyncio.gather(
+            batcher.check('a.py', '1'),
+            batcher.check('b.py', '1'),
+            return_exceptions=True)
+
+        self.assertEqual(results, [error, error])
+        self.assertIsNone(batcher._drain_task)
+
+
+class _StubLSPServer:
+    """Push-mode server answering from canned diagnostics"""
+
+    diagnostic_provider = None
+
+    def __init__(self):
+        self.calls = []
+        # file name -> diagnostics already published for its version
+        self.published = {}
+
+    async def open_document(self, file_path, content, language_id):
+        self.calls.append(('open', os.path.basename(file_path)))
+
+    async def update_document(self, file_path, content, version=2):
+        self.calls.append(('update', os.path.basename(file_path), version))
+
+    async def get_diagnostics(self, file_path):
+        self.calls.append(('get', os.path.basename(file_path)))
+        return []
+
+    def cached_diagnostics(self, file_path, version):
+        name = os.path.basename(file_path)
+        self.calls.append(('cached', name))
+        return self.published.get(name)
+
+
+class TestUpdateAndCheckBatch(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.code_server = LSPCodeServer(
+            DictConfig({'output_dir': self.tmp_dir}))
+        self.server = _StubLSPServer()
+        self.code_server.servers['python'] = self.server
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    async def test_later_files_use_cached_or_wait(self):
+        self.server.published['b.py'] = [_diagnostic('undefined name')]
+        files = [{
+            'file_path': name,
+            'content': ''
+        } for name in ('a.py', 'b.py', 'c.py')]
+
+        results = await self.code_server.update_and_check_batch(
+            files, 'python')
+
+        self.assertEqual(self.server.calls,
+                         [('open', 'a.py'), ('open', 'b.py'), ('open', 'c.py'),
+                          ('get', 'a.py'), ('cached', 'b.py'),
+                          ('cached', 'c.py'), ('get', 'c.py')])
+        self.assertEqual(results[0], '')
+        self.assertIn('undefined name', results[1])
+        self.assertEqual(results[2], '')
+
+    async def test_last_check_reused_until_workspace_changes(self):
+        files = [{'file_path': 'a.py', 'content': 'x = 1'}]
+
+        await self.code_server.update_and_check_batch(files, 'python')
+        await self.code_server.update_and_check_batch(files, 'python')
+        self.assertEqual(self.server.calls, [('open', 'a.py'),
+                                             ('get', 'a.py')])
+
+        self.code_server.mark_workspace_changed()
+        await self.code_server.update_and_check_batch(files, 'python')
+        self.assertEqual(self.server.calls[2:], [('update', 'a.py', 2),
+                                                 ('get', 'a.py')])
+
+        await self.code_server.update_and_check_batch([{
+            'file_path': 'a.py',
+            'content': 'x = 2'
+        }], 'python')
+        self.assertEqual(self.server.calls[4:], [('update', 'a.py', 3),
+                                                 ('get', 'a.py')])
+
+
+class TestCachedDiagnostics(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.server = LSPServer(DictConfig({'output_dir': self.tmp_dir}))
+        self.file_path = os.path.join(self.tmp_dir, 'main.py')
+        self.uri = Path(self.file_path).resolve().as_uri()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_version_must_match(self):
+        diag = _diagnostic('undefined name')
+        self.server._cache_published({
+            'uri': self.uri,
+            'version': 2,
+            'diagnostics': [diag]
+        })
+        self.assertEqual(
+            self.server.cached_diagnostics(self.file_path, 2), [diag])
+        self.assertIsNone(self.server.cached_diagnostics(self.file_path, 3))
+
+    def test_unversioned_publish_is_not_trusted(self):
+        self.server._cache_published({
+            'uri':
+            self.uri,
+            'diagnostics': [_diagnostic('undefined name')]
+        })
+        self.assertIsNone(self.server.cached_diagnostics(self.file_path, 2))
+
+
+def _range(start_line, start_char, end_line, end_char) -> dict:
+    return {
+        'start': {
+            'line': start_line,
+            'character': start_char
+        },
+        'end': {
+            'line': end_line,
+            'character': end_char
+        }
+    }
+
+
+class TestTextChange(unittest.TestCase):
+
+    def test_text_change(self):
+        cases = [
+            # (old, new, expected change)
+            ('ab\n', 'ab\ncd', {
+                'range': _range(1, 0, 1, 0),
+                'text': 'cd'
+            }),
+            ('foo = 1\nbar = 2\n', 'foo = 1\nbaz = 2\n', {
+                'range': _range(1, 2, 1, 3),
+                'text': 'z'
+            }),
+            ('a\nb\nc', 'a\nc', {
+                'range': _range(1, 0, 2, 0),
+                'text': ''
+            }),
+            # The emoji is two UTF-16 code units
+            ('x = "\U0001F600"; y\n', 'x = "\U0001F600"; z\n', {
+                'range': _range(0, 10, 0, 11),
+                'text': 'z'
+            }),
+            # \r line endings fall back to the full text
+            ('a\r\nb', 'a\r\nc', {
+                'text': 'a\r\nc'
+            }),
+        ]
+        for old, new, expected in cases:
+            with self.subTest(old=old, new=new):
+                self.assertEqual(_text_change(old, new), expected)
+
+
 if __name__ == '__main__':
     unittest.main()
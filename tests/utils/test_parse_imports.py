@@ -4,7 +4,8 @@ import tempfile
 import unittest
 from pathlib import Path
 
-from ms_agent.utils.parser_utils import parse_imports
+from ms_agent.utils.parser_utils import (parse_imports, parse_imports_batch,
+                                         parse_imports_parallel)
 
 
 class TestPythonExternalPackageFiltering(unittest.TestCase):
@@ -136,6 +137,16 @@ class TestPythonProjectFileImports(unittest.TestCase):
         self.assertEqual(len(imports), 1)
         self.assertIn('helper', imports[0].imported_items)
 
+    def test_consecutive_imports_not_merged(self):
+        """Test that consecutive 'import' lines are parsed one by one"""
+        content = 'import os\nimport mypackage.utils as u\nimport sys\n'
+        imports = parse_imports(self.test_file, content, self.temp_dir)
+
+        self.assertEqual(len(imports), 1)
+        self.assertEqual(imports[0].source_file, 'mypackage/utils.py')
+        self.assertEqual(imports[0].alias, 'u')
+        self.assertEqual(imports[0].raw_statement, 'import mypackage.utils')
+
     def test_relative_output_dir_no_excessive_parent_dirs(self):
         """Test that relative output_dir doesn't cause excessive '../' in paths
 
@@ -570,6 +581,64 @@ class TestJavaScriptPathAlias(unittest.TestCase):
         full_path = os.path.join(self.temp_dir, imports[0].source_file)
         self.assertTrue(os.path.exists(full_path))
 
+    def test_most_specific_alias_wins(self):
+        """Test that the longest matching alias prefix is used"""
+        import json
+        lib_dir = os.path.join(self.temp_dir, 'vendor', 'lib')
+        os.makedirs(lib_dir)
+        Path(os.path.join(lib_dir, 'format.ts')).touch()
+        tsconfig = {
+            'compilerOptions': {
+                'baseUrl': '.',
+                'paths': {
+                    '@/*': ['src/*'],
+                    '@/lib/*': ['vendor/lib/*']
+                }
+            }
+        }
+        with open(os.path.join(self.temp_dir, 'tsconfig.json'), 'w') as f:
+            json.dump(tsconfig, f)
+
+        content = "import { format } from '@/lib/format'"
+        imports = parse_imports(self.app_file, content, self.temp_dir)
+
+        self.assertEqual(len(imports), 1)
+        source = imports[0].source_file.replace('\\', '/')
+        self.assertEqual(source, 'vendor/lib/format.ts')
+
+    def test_tsconfig_comments_and_trailing_commas(self):
+        """Test JSONC tsconfig parsing and reload after the file changes"""
+        tsconfig_path = os.path.join(self.temp_dir, 'tsconfig.json')
+        with open(tsconfig_path, 'w') as f:
+            f.write('{\n'
+                    '  // path aliases\n'
+                    '  "compilerOptions": {\n'
+                    '    "baseUrl": ".",\n'
+                    '    "paths": {"@api/*": ["src/api/*"],},\n'
+                    '  },\n'
+                    '}\n')
+        content = "import { getUser } from '@api/user'"
+        imports = parse_imports(self.app_file, content, self.temp_dir)
+        self.assertEqual(len(imports), 1)
+        self.assertEqual(imports[0].source_file.replace('\\', '/'),
+                         'src/api/user.ts')
+
+        # Re-point the alias; the cached parse must be invalidated
+        shared_dir = os.path.join(self.temp_dir, 'shared')
+        os.makedirs(shared_dir)
+        Path(os.path.join(shared_dir, 'user.ts')).touch()
+        with open(tsconfig_path, 'w') as f:
+            f.write('{"compilerOptions": {"paths": '
+                    '{"@api/*": ["shared/*"]}}}')
+        stat = os.stat(tsconfig_path)
+        os.utime(
+            tsconfig_path,
+            ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        imports = parse_imports(self.app_file, content, self.temp_dir)
+        self.assertEqual(len(imports), 1)
+        self.assertEqual(imports[0].source_file.replace('\\', '/'),
+                         'shared/user.ts')
+
 
 class TestJavaExternalPackageFiltering(unittest.TestCase):
     """Test that Java external packages are filtered out"""
@@ -1245,5 +1314,60 @@ import icon from './logo.svg';
             f'SVG import should NOT have .js appended, got: {svg_import}')
 
 
+class TestParseImportsBatch(unittest.TestCase):
+    """Test that batch parsing matches per-file parsing"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.temp_dir, 'src', 'api'))
+        os.makedirs(os.path.join(self.temp_dir, 'pkg'))
+        for rel in ('src/App.tsx', 'src/api/user.ts', 'pkg/__init__.py',
+                    'pkg/main.py', 'pkg/utils.py'):
+            Path(os.path.join(self.temp_dir, rel)).touch()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_batch_matches_single(self):
+        """Test that each file gets the same imports as parse_imports"""
+        files = [
+            (os.path.join(self.temp_dir, 'src', 'App.tsx'),
+             "import React from 'react'\n"
+             "import { getUser } from './api/user'"),
+            (os.path.join(self.temp_dir, 'src', 'api', 'user.ts'),
+             "import axios from 'axios'"),
+            (os.path.join(self.temp_dir, 'pkg', 'main.py'),
+             'import os\nfrom .utils import helper'),
+            (os.path.join(self.temp_dir, 'README.md'), '# readme'),
+        ]
+        results = parse_imports_batch(files, self.temp_dir)
+
+        self.assertEqual(len(results), len(files))
+        for current_file, content in files:
+            expected = parse_imports(current_file, content, self.temp_dir)
+            self.assertEqual(
+                [(i.source_file, i.imported_items)
+                 for i in results[current_file]],
+                [(i.source_file, i.imported_items) for i in expected])
+        app_imports = results[files[0][0]]
+        self.assertEqual(len(app_imports), 1)
+        self.assertEqual(app_imports[0].source_file.replace('\\', '/'),
+                         'src/api/user.ts')
+
+    def test_parallel_matches_batch(self):
+        """Test that process-parallel parsing matches batch parsing"""
+        files = [(os.path.join(self.temp_dir, 'pkg', f'mod{i}.py'),
+                  'from .utils import helper\nimport os') for i in range(8)]
+        expected = parse_imports_batch(files, self.temp_dir)
+        results = parse_imports_parallel(files, self.temp_dir, workers=2)
+
+        self.assertEqual(set(results), set(expected))
+        for current_file, imports in expected.items():
+            self.assertEqual(
+                [(i.source_file, i.imported_items)
+                 for i in results[current_file]],
+                [(i.source_file, i.imported_items) for i in imports])
+
+
 if __name__ == '__main__':
     unittest.main()